@@ -1,28 +1,99 @@
 # forensic_tool_web/app.py
 
+import cProfile
 import os
 import datetime
+import functools
+import io
+import json
 import logging
-import zipfile
-import shutil
+import multiprocessing
 import uuid
-from flask import Flask, render_template, request, session, send_from_directory, flash, jsonify
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from flask import Flask, Request, Response, current_app, g, render_template, request, session, send_from_directory, jsonify, stream_with_context
 from werkzeug.utils import secure_filename
 from termcolor import colored
 
 # --- Local Imports ---
-from hashing import hash_text, hash_file, hash_directory
-from utils import get_file_metadata, format_size
-from reporting import PDFReport
+import fuzzy
+import metrics
+from archives import SEPARATOR, ArchiveIncompleteError, iter_archive
+from hashing import StreamingHasher, add_to_summary, hash_text, hash_texts, hash_stream, resolve_algorithms
+from utils import NOT_RETAINED, get_upload_metadata, format_size
+from jobs import JobManager
+from knownhash import KnownHashDB
+from resultstore import ResultStore
+from manifest import FORMATS as MANIFEST_FORMATS, iter_manifest
+from verify import load_manifest, verify_zip
+from renderer import ReportRenderer
+
+def _request_algorithms(selection):
+    """resolve_algorithms() for web requests, which only get ssdeep from the native package.
+
+    The pure-Python fallback would hold the GIL on a request or job thread
+    for about a second per MiB.
+    """
+    algorithms = resolve_algorithms(selection)
+    if 'ssdeep' in algorithms and not fuzzy.NATIVE:
+        raise ValueError("ssdeep hashing needs the ssdeep package, which is not installed on this server.")
+    return algorithms
+
+# --- Streaming Uploads ---
+class HashingRequest(Request):
+    """Request that hashes single-file uploads while the body is being received."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # The front-end marks file hashing requests in the query string, because
+        # form fields are not parsed yet when the file part starts arriving.
+        if self.args.get('hash_type') != 'file':
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        try:
+            algorithms = _request_algorithms(self.args.get('profile'))
+        except ValueError:
+            # process_hash rejects the request; just buffer the upload as usual.
+            return super()._get_file_stream(total_content_length, content_type, filename, content_length)
+        retain_path = None
+        if current_app.config['RETAIN_UPLOADS']:
+            retain_name = f"{uuid.uuid4().hex}_{secure_filename(filename or 'upload')}"
+            retain_path = os.path.join(current_app.config['UPLOAD_FOLDER'], retain_name)
+        return StreamingHasher(retain_path, algorithms=algorithms)
 
 # --- Flask App Setup ---
 app = Flask(__name__)
+app.request_class = HashingRequest
 app.secret_key = os.urandom(24)
 # Get the absolute path for the app's directory
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
 app.config['UPLOAD_FOLDER'] = os.path.join(BASE_DIR, 'uploads')
 app.config['REPORTS_FOLDER'] = os.path.join(BASE_DIR, 'reports')
 app.config['MAX_CONTENT_LENGTH'] = 1024 * 1024 * 1024  # 1 GB max upload
+app.config['RETAIN_UPLOADS'] = False  # Keep a copy of streamed file uploads in UPLOAD_FOLDER
+app.config['JOB_WORKERS'] = 4  # Directory jobs that may run at the same time
+app.config['KNOWN_HASH_DB'] = os.path.join(BASE_DIR, 'knownhashes')  # Built with knownhash.py
+app.config['RESULT_STORE'] = os.path.join(BASE_DIR, 'results.db')  # Server-side hashing results
+app.config['RESULT_TTL'] = 24 * 3600  # Seconds before stored results are purged
+app.config['RESULT_DISPLAY_LIMIT'] = 1000  # Directory entries sent to the browser for display
+app.config['NESTED_ARCHIVE_DEPTH'] = 3  # Archives inside the uploaded ZIP expanded this many levels deep
+app.config['BULK_TEXT_WORKERS'] = os.cpu_count() or 1  # Processes for /bulk_hash; 1 hashes in the request thread
+app.config['METRICS_LOCAL_ONLY'] = True  # Serve /metrics to loopback clients only
+app.config['REQUEST_TRACING'] = False  # Allow ?trace=1 to write a cProfile trace of a request
+app.config['TRACE_FOLDER'] = os.path.join(BASE_DIR, 'logs', 'traces')
+app.config['REPORT_WORKERS'] = 1  # Renderer processes that build PDF reports in the background
+
+jobs = JobManager(max_workers=app.config['JOB_WORKERS'])
+known_db = KnownHashDB(app.config['KNOWN_HASH_DB']) if os.path.isdir(app.config['KNOWN_HASH_DB']) else None
+result_store = ResultStore(app.config['RESULT_STORE'], ttl_seconds=app.config['RESULT_TTL'])
+# Long-lived worker processes come from a fork server (or are spawned), never forked from this
+# process: its job, hasher and renderer threads may hold locks at the moment of the fork.
+worker_context = multiprocessing.get_context(
+    'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn')
+# One pool for /bulk_hash; its processes start on first use and are kept.
+bulk_pool = None
+if app.config['BULK_TEXT_WORKERS'] != 1:
+    bulk_pool = ProcessPoolExecutor(max_workers=app.config['BULK_TEXT_WORKERS'], mp_context=worker_context)
+report_renderer = ReportRenderer(app.config['RESULT_STORE'], app.config['REPORTS_FOLDER'],
+                                 workers=app.config['REPORT_WORKERS'], mp_context=worker_context)
 
 # --- Logging Setup ---
 if not os.path.exists(os.path.join(BASE_DIR, 'logs')):
@@ -44,13 +115,61 @@ def _jinja2_filter_format_size(size):
 def index():
     """Renders the main page."""
     session.clear() # Clear session on new visit for a clean start
-    return render_template('index.html')
+    return render_template('index.html', fuzzy_native=fuzzy.NATIVE)
+
+@app.before_request
+def _purge_reports():
+    # Throttled inside; reports go once their results have expired.
+    report_renderer.purge_expired(result_store)
+
+@app.before_request
+def _start_trace():
+    if app.config['REQUEST_TRACING'] and request.args.get('trace') == '1':
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Only one profiler can be active at a time; this request goes untraced.
+            logging.info(f"Skipped trace of {request.path}: another trace is running")
+            return
+        g.profiler = profiler
+
+@app.after_request
+def _finish_trace(response):
+    profiler = g.pop('profiler', None)
+    if profiler is not None:
+        # Streamed responses are only traced up to the point the response is returned.
+        profiler.disable()
+        os.makedirs(app.config['TRACE_FOLDER'], exist_ok=True)
+        trace_name = f"{request.endpoint}_{datetime.datetime.now():%Y%m%d_%H%M%S_%f}.prof"
+        profiler.dump_stats(os.path.join(app.config['TRACE_FOLDER'], trace_name))
+        response.headers['X-Trace-File'] = trace_name
+        logging.info(f"Wrote request trace {trace_name}")
+    return response
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Exposes hashing, stage and job metrics in the Prometheus text format."""
+    if app.config['METRICS_LOCAL_ONLY'] and request.remote_addr not in ('127.0.0.1', '::1'):
+        return jsonify({'status': 'error', 'message': 'Metrics are only available locally.'}), 403
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
 
 @app.route('/process', methods=['POST'])
+@metrics.timed('request:process')
 def process_hash():
     """Handles hashing requests from the front-end JavaScript and returns JSON."""
-    hash_type = request.form.get('hash_type')
-    session['report_data'] = {} # Reset report data
+    # Parsing the form receives the upload, and for single files hashes it in flight.
+    with metrics.stage('upload'):
+        request.form
+    hash_type = request.args.get('hash_type') or request.form.get('hash_type')
+    session.pop('result_id', None) # Reset report data
+
+    try:
+        # A profile name (triage, court, full, ...) or a comma-separated algorithm list.
+        algorithms = _request_algorithms(request.args.get('profile') or request.form.get('profile'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    algorithm_names = [alg.upper() for alg in algorithms]
 
     try:
         if hash_type == 'text':
@@ -58,9 +177,12 @@ def process_hash():
             if not text_to_hash:
                 return jsonify({'status': 'error', 'message': 'Text input cannot be empty.'}), 400
             
-            hashes = hash_text(text_to_hash)
+            hashes = hash_text(text_to_hash, algorithms)
             results_data = {'type': 'text', 'text': text_to_hash, 'hashes': hashes}
-            session['report_data']['text_results'] = {'text': text_to_hash, 'hashes': hashes}
+            session['result_id'] = result_store.save('text', {
+                'algorithms': algorithm_names,
+                'text_results': {'text': text_to_hash, 'hashes': hashes}
+            })
             logging.info(f"Hashed text input.")
 
         elif hash_type == 'file':
@@ -69,15 +191,21 @@ def process_hash():
                 return jsonify({'status': 'error', 'message': 'No file was selected.'}), 400
             
             filename = secure_filename(file.filename)
-            filepath = os.path.join(app.config['UPLOAD_FOLDER'], filename)
-            file.save(filepath)
-            
-            metadata = get_file_metadata(filepath)
-            hashes = hash_file(filepath)
-            os.remove(filepath)
+            if isinstance(file.stream, StreamingHasher):
+                # Already hashed chunk by chunk while the upload was received.
+                hashes = file.stream.hexdigests()
+                metadata = get_upload_metadata(filename, file.stream.size, file.stream.retain_path)
+            else:
+                hashes = hash_stream(file.stream, algorithms=algorithms)
+                metadata = get_upload_metadata(filename, file.stream.tell())
+            if known_db is not None:
+                metadata['Known Status'] = known_db.classify(hashes)
             
             results_data = {'type': 'file', 'metadata': metadata, 'hashes': hashes}
-            session['report_data']['file_results'] = {'metadata': metadata, 'hashes': hashes}
+            session['result_id'] = result_store.save('file', {
+                'algorithms': algorithm_names,
+                'file_results': {'metadata': metadata, 'hashes': hashes}
+            })
             logging.info(f"Hashed file: {filename}")
         
         elif hash_type == 'directory':
@@ -85,23 +213,18 @@ def process_hash():
             if not file or not file.filename.endswith('.zip'):
                 return jsonify({'status': 'error', 'message': 'A .zip archive must be uploaded.'}), 400
             
-            temp_dir = os.path.join(app.config['UPLOAD_FOLDER'], str(uuid.uuid4()))
-            os.makedirs(temp_dir)
-            zip_path = os.path.join(app.config['UPLOAD_FOLDER'], secure_filename(file.filename))
+            # The archive outlives this request, so it is kept until the job has hashed it.
+            os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+            zip_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}.zip")
             file.save(zip_path)
             
-            with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-                zip_ref.extractall(temp_dir)
-            
-            results, summary = hash_directory(temp_dir)
-            
-            # Cleanup
-            shutil.rmtree(temp_dir)
-            os.remove(zip_path)
-            
-            results_data = {'type': 'directory', 'results': results, 'summary': summary}
-            session['report_data']['dir_results'] = {'results': results, 'summary': summary}
-            logging.info(f"Hashed directory from ZIP: {file.filename}")
+            job_id = uuid.uuid4().hex
+            # Recorded next to the upload, so a job cut short by a restart is resumed (see resume_interrupted_jobs).
+            _save_job_state(zip_path, {'job_id': job_id, 'algorithms': algorithms, 'description': file.filename})
+            job = jobs.submit(_run_zip_job, zip_path, algorithms, description=file.filename, job_id=job_id)
+            session['job_id'] = job.id
+            logging.info(f"Queued directory job {job.id} for ZIP: {file.filename}")
+            return jsonify({'status': 'queued', 'job_id': job.id, 'status_url': f'/jobs/{job.id}'}), 202
 
         return jsonify({'status': 'success', 'data': results_data})
         
@@ -110,38 +233,312 @@ def process_hash():
         return jsonify({'status': 'error', 'message': f'An server error occurred: {e}'}), 500
 
 
+def _job_state_path(zip_path):
+    return os.path.splitext(zip_path)[0] + '.job.json'
+
+def _save_job_state(zip_path, state):
+    tmp_path = _job_state_path(zip_path) + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(state, f)
+    os.replace(tmp_path, _job_state_path(zip_path))
+
+
+def _run_zip_job(job, zip_path, algorithms, result_id=None):
+    """Job body for directory hashing: streams results into the result store, then removes the upload.
+
+    Entries are stored in batches. Given the result_id of an interrupted
+    run, top-level members already stored completely are not hashed again;
+    whatever was stored of the member that was cut short is dropped.
+    """
+    try:
+        with zipfile.ZipFile(zip_path, 'r') as archive:
+            members = [info for info in archive.infolist() if not info.is_dir()]
+        job.set_totals(sum(info.file_size for info in members), len(members))
+
+        summary = {"Total Files Processed": 0, "Total Directory Size": 0, "CRC Mismatches": 0}
+        done = set()
+        if result_id and result_store.get(result_id) is not None:
+            kept, pending = 0, []
+            for seq, item in enumerate(result_store.iter_entries(result_id)):
+                pending.append(item)
+                top = item["metadata"]["File Path"].split(SEPARATOR, 1)[0]
+                if top != item["metadata"]["File Path"]:
+                    continue
+                # iter_archive() yields a top-level member after everything nested in it, so it is complete.
+                for stored in pending:
+                    add_to_summary(summary, stored)
+                    nbytes = stored["metadata"]["File Size"] if stored["hashes"] else 0
+                    if stored is not item:
+                        job.add_totals(nbytes, 1)
+                    job.advance(nbytes, 1)
+                kept, pending = seq + 1, []
+                done.add(top)
+            if pending:
+                result_store.truncate(result_id, kept)
+            logging.info(f"Resuming {job.description} after {len(done)} stored members")
+        else:
+            result_id = result_store.create('directory', {'algorithms': [alg.upper() for alg in algorithms]})
+            _save_job_state(zip_path, {'job_id': job.id, 'algorithms': algorithms, 'description': job.description,
+                                       'result_id': result_id})
+        batch = []
+        # Members, and archives nested in them, are streamed from the upload; nothing is extracted.
+        try:
+            for item in iter_archive(zip_path, progress=job.advance, known_db=known_db, algorithms=algorithms,
+                                     max_depth=app.config['NESTED_ARCHIVE_DEPTH'], skip=done):
+                top = item["metadata"]["File Path"].split(SEPARATOR, 1)[0]
+                if top != item["metadata"]["File Path"]:
+                    # Nested members were not in the upload's listing; count them as they are found.
+                    # Skipped ones were never read, so their bytes are left out.
+                    job.add_totals(item["metadata"]["File Size"] if item["hashes"] else 0, 1)
+                add_to_summary(summary, item)
+                batch.append(item)
+                if len(batch) >= 200:
+                    result_store.append(result_id, batch)
+                    batch = []
+        except ArchiveIncompleteError as e:
+            logging.warning(f"{job.description}: {e}")
+            summary["Archive Error"] = str(e)
+        result_store.append(result_id, batch)
+        result_store.finish(result_id, summary=summary)
+        logging.info(f"Hashed directory from ZIP: {job.description}")
+        return {'result_id': result_id}
+    finally:
+        os.remove(zip_path)
+        if os.path.exists(_job_state_path(zip_path)):
+            os.remove(_job_state_path(zip_path))
+
+
+def resume_interrupted_jobs():
+    """Requeues ZIP jobs whose upload is still in UPLOAD_FOLDER, i.e. that a restart cut short.
+
+    Call it once per server, from the process that serves requests.
+    """
+    folder = app.config['UPLOAD_FOLDER']
+    if not os.path.isdir(folder):
+        return
+    for name in os.listdir(folder):
+        if not name.endswith('.job.json'):
+            continue
+        state_path = os.path.join(folder, name)
+        zip_path = state_path[:-len('.job.json')] + '.zip'
+        try:
+            with open(state_path, 'r', encoding='utf-8') as f:
+                state = json.load(f)
+        except (OSError, ValueError) as e:
+            logging.error(f"Could not read job state {name}: {e}")
+            continue
+        if not os.path.exists(zip_path):
+            os.remove(state_path)
+            continue
+        jobs.submit(_run_zip_job, zip_path, state['algorithms'], state.get('result_id'),
+                    description=state['description'], job_id=state['job_id'])
+        logging.info(f"Resumed directory job {state['job_id']} for ZIP: {state['description']}")
+
+
+def _run_verify_job(job, zip_path, entries, quick, fail_fast):
+    """Job body for verification: compares the archive with the manifest, then removes the upload."""
+    try:
+        # Nested archive members are covered by their container and not checked on their own.
+        job.set_totals(None, sum(SEPARATOR not in path for path in entries))
+        report = verify_zip(entries, zip_path, fail_fast=fail_fast, quick=quick, progress=job.advance)
+        logging.info(f"Verified {job.description}: {len(report['matched'])} matched, "
+                     f"{len(report['modified'])} modified, {len(report['missing'])} missing, "
+                     f"{len(report['added'])} added")
+        return {'data': {'type': 'verify', **report}}
+    finally:
+        os.remove(zip_path)
+
+
+@app.route('/verify', methods=['POST'])
+def verify_manifest():
+    """Queues a check of a ZIP archive against a manifest exported earlier."""
+    manifest_file = request.files.get('manifest_input')
+    file = request.files.get('dir_input')
+    if not manifest_file or manifest_file.filename == '':
+        return jsonify({'status': 'error', 'message': 'A manifest file must be uploaded.'}), 400
+    if not file or not file.filename.endswith('.zip'):
+        return jsonify({'status': 'error', 'message': 'A .zip archive must be uploaded.'}), 400
+
+    try:
+        entries = load_manifest(manifest_file.stream)
+    except (ValueError, KeyError) as e:
+        return jsonify({'status': 'error', 'message': f'Could not read the manifest: {e}'}), 400
+
+    os.makedirs(app.config['UPLOAD_FOLDER'], exist_ok=True)
+    zip_path = os.path.join(app.config['UPLOAD_FOLDER'], f"{uuid.uuid4().hex}.zip")
+    file.save(zip_path)
+    job = jobs.submit(_run_verify_job, zip_path, entries, request.form.get('quick') == 'on',
+                      request.form.get('fail_fast') == 'on', description=file.filename)
+    logging.info(f"Queued verification job {job.id} for ZIP: {file.filename}")
+    return jsonify({'status': 'queued', 'job_id': job.id, 'status_url': f'/jobs/{job.id}'}), 202
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Reports progress for a queued job, and its results once it has completed."""
+    job = jobs.get(job_id)
+    if job is None:
+        return jsonify({'status': 'error', 'message': 'Unknown or expired job.'}), 404
+
+    response = {'status': 'success', 'job': job.status()}
+    if job.state == 'completed' and 'data' in job.result:
+        response['data'] = job.result['data']
+    elif job.state == 'completed':
+        result_id = job.result['result_id']
+        header = result_store.get(result_id)
+        if header is None:
+            return jsonify({'status': 'error', 'message': 'The results of this job have expired.'}), 404
+        # Only the first entries are sent for display; reports read the full set from the store.
+        limit = app.config['RESULT_DISPLAY_LIMIT']
+        response['data'] = {
+            'type': 'directory',
+            'summary': header['summary'],
+            'results': list(result_store.iter_entries(result_id, limit=limit)),
+            'truncated': header['entry_count'] > limit,
+        }
+        if session.get('job_id') == job.id:
+            session['result_id'] = result_id
+            session.pop('job_id')
+    elif job.state == 'failed':
+        response['status'] = 'error'
+        response['message'] = f'An server error occurred: {job.error}'
+    return jsonify(response)
+
+
+@app.route('/export/<fmt>')
+def export_manifest(fmt):
+    """Streams the current results as a JSON Lines, CSV or hashdeep manifest."""
+    if fmt not in MANIFEST_FORMATS:
+        return jsonify({'status': 'error', 'message': f'Unknown export format: {fmt}'}), 404
+    result_id = session.get('result_id')
+    header = result_store.get(result_id) if result_id else None
+    if header is None:
+        return jsonify({'status': 'error', 'message': 'No results to export. Please perform a new hash operation.'}), 404
+
+    if header.get('summary') is not None:
+        # Read from the store row by row, so memory stays flat however large the case is.
+        items = result_store.iter_entries(result_id)
+    elif header.get('file_results'):
+        item = header['file_results']
+        if item['metadata']['File Path'] == NOT_RETAINED:
+            # The upload has no path on disk; list it under its file name.
+            item = {**item, 'metadata': {**item['metadata'], 'File Path': item['metadata']['File Name']}}
+        items = [item]
+    else:
+        return jsonify({'status': 'error', 'message': 'Manifests are only available for file and directory results.'}), 400
+
+    try:
+        chunks = iter_manifest(items, fmt, header['algorithms'])
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+    mimetype, extension = MANIFEST_FORMATS[fmt]
+    logging.info(f"Exporting {fmt} manifest for result {result_id}")
+    return Response(chunks, mimetype=mimetype, headers={
+        'Content-Disposition': f'attachment; filename=Forensic_Manifest_{result_id[:8]}.{extension}'
+    })
+
+
+def _iter_lines(stream, errors):
+    """Yields the non-empty lines of a binary stream as text, stopping at the first invalid line.
+
+    The problem is appended to errors, so lines read before it are still hashed.
+    """
+    for number, line in enumerate(stream, 1):
+        try:
+            line = line.decode('utf-8').rstrip('\r\n')
+        except UnicodeDecodeError as e:
+            errors.append(f'Line {number} is not valid UTF-8: {e}')
+            return
+        if line:
+            yield line
+
+@app.route('/bulk_hash', methods=['POST'])
+def bulk_hash():
+    """Hashes many strings and streams back one JSON line per string.
+
+    The body is a JSON array of strings, or newline-delimited text sent
+    either as the raw body or as an uploaded 'texts_input' file.
+    """
+    try:
+        algorithms = _request_algorithms(request.args.get('profile'))
+    except ValueError as e:
+        return jsonify({'status': 'error', 'message': str(e)}), 400
+
+    upload = None
+    errors = []
+    if request.is_json:
+        texts = request.get_json(silent=True)
+        if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+            return jsonify({'status': 'error', 'message': 'The JSON body must be an array of strings.'}), 400
+    elif 'texts_input' in request.files:
+        # Flask closes uploaded files when the view returns, before the response
+        # is streamed, so the upload's stream is taken over and closed here.
+        file = request.files['texts_input']
+        upload, file.stream = file.stream, io.BytesIO()
+        texts = _iter_lines(upload, errors)
+    else:
+        # Read while the response is written, so the input is never held in full.
+        texts = _iter_lines(request.stream, errors)
+
+    def generate():
+        count = 0
+        try:
+            for text, hashes in hash_texts(texts, algorithms, workers=app.config['BULK_TEXT_WORKERS'],
+                                           pool=bulk_pool):
+                count += 1
+                yield json.dumps({'text': text, 'hashes': hashes}) + '\n'
+            for error in errors:
+                # The status line has already been sent; report the problem in the stream itself.
+                yield json.dumps({'error': error}) + '\n'
+        finally:
+            if upload is not None:
+                upload.close()
+        logging.info(f"Bulk-hashed {count} strings")
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+
+def _report_result(path, _):
+    """Job result of a finished report render."""
+    logging.info(f"Generated report '{path}'")
+    return {'data': {'type': 'report', 'download_url': f'/reports/{path}'}}
+
+
 @app.route('/generate_report', methods=['POST'])
+@metrics.timed('request:generate_report')
 def generate_report():
-    """Generates and serves the PDF report."""
-    if 'report_data' not in session or not session['report_data']:
-        flash('Error: Session expired or no data to report. Please perform a new hash operation.', 'error')
-        return render_template('index.html')
+    """Queues the PDF report, or points straight at it if it was already rendered."""
+    result_id = session.get('result_id')
+    if not result_id or result_store.get(result_id) is None:
+        return jsonify({'status': 'error',
+                        'message': 'Session expired or no data to report. Please perform a new hash operation.'}), 400
 
     try:
-        case_id = request.form['case_id']
         case_metadata = {
             "investigator_name": request.form['investigator_name'],
-            "case_id": case_id,
+            "case_id": request.form['case_id'],
             "case_description": request.form['case_description'],
             "date_time": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
         }
+    except KeyError as e:
+        return jsonify({'status': 'error', 'message': f'Missing report field: {e.args[0]}'}), 400
 
-        safe_case_id = "".join(c for c in case_id if c.isalnum() or c in ('_')).rstrip()
-        report_filename = f"Forensic_Report_{safe_case_id}_{datetime.datetime.now():%Y%m%d_%H%M%S}.pdf"
-        report_filepath = os.path.join(app.config['REPORTS_FOLDER'], report_filename)
-        
-        pdf = PDFReport(report_filepath)
-        pdf.generate_cover_page(case_metadata)
-        pdf.add_hashing_results(session.get('report_data', {}))
-        pdf.save()
-        logging.info(f"Generated report '{report_filename}'")
-        
-        return send_from_directory(app.config['REPORTS_FOLDER'], report_filename, as_attachment=True)
-    
-    except Exception as e:
-        logging.error(f"Failed to generate report: {e}", exc_info=True)
-        flash(f'Error creating PDF: {e}. Please check logs.', 'error')
-        return render_template('index.html')
+    path = report_renderer.cached(result_id, case_metadata)
+    if path:
+        logging.info(f"Serving cached report '{path}'")
+        return jsonify({'status': 'success', 'data': {'type': 'report', 'download_url': f'/reports/{path}'}})
+    # Tracked rather than submitted: the renderer process does the work, so no job thread waits for it.
+    path, future = report_renderer.submit(result_id, case_metadata)
+    job = jobs.track(future, description=f"Report {case_metadata['case_id']}",
+                     result=functools.partial(_report_result, path))
+    logging.info(f"Queued report job {job.id} for case {case_metadata['case_id']}")
+    return jsonify({'status': 'queued', 'job_id': job.id, 'status_url': f'/jobs/{job.id}'}), 202
+
+
+@app.route('/reports/<path:filename>')
+def download_report(filename):
+    """Serves a rendered PDF report."""
+    return send_from_directory(app.config['REPORTS_FOLDER'], filename, as_attachment=True)
 
 
 if __name__ == '__main__':
@@ -158,4 +555,7 @@ if __name__ == '__main__':
     print(colored("      => http://127.0.0.1:5000", 'white', 'on_blue'))
     print("="*80)
     
+    # The debug reloader runs this script twice; only the child that serves requests resumes jobs.
+    if os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        resume_interrupted_jobs()
     app.run(debug=True, host='0.0.0.0')
@@ -0,0 +1,278 @@
+# forensic_tool_web/archives.py
+
+"""Hashing of archives nested inside archives, without extracting anything to disk.
+
+Members of a ZIP, tar (optionally gzip, bzip2 or xz compressed) or gzip
+file are streamed through the hashers. A member that is itself an archive
+is hashed like any other file and, within the limits below, buffered in
+memory and expanded in turn. Nested members are reported with their full
+container path, e.g. "outer.zip!/inner.tar.gz!/docs/report.pdf", ahead of
+the nested archive itself, whose "Nested Archive" entry then says whether
+it was expanded completely.
+"""
+
+import bz2
+import datetime
+import gzip
+import io
+import lzma
+import os
+import tarfile
+import zipfile
+
+from hashing import BUFFER_SIZE, MultiHasher, _tag_known, hash_stream, resolve_algorithms
+
+# How many archives deep to expand; the top-level archive is depth 0.
+MAX_DEPTH = 3
+# Largest nested archive that is buffered in memory for expansion.
+MAX_NESTED_BYTES = 256 * 1024 * 1024
+# Largest uncompressed/compressed ratio accepted for an archive member that is expanded, a member
+# inside a nested archive, or a nested compressed stream. Other top-level members and top-level
+# streams only count against the total.
+MAX_RATIO = 100
+# A compressed stream is measured as if at least this much of it had been read, so a small
+# archive of very compressible files is not mistaken for a bomb.
+RATIO_MIN_COMPRESSED = 1024 * 1024
+# Total uncompressed bytes read across the whole run before it is stopped.
+MAX_TOTAL_BYTES = 64 * 1024 * 1024 * 1024
+
+SEPARATOR = '!/'
+
+_TAR_SUFFIXES = ('.tar', '.tar.gz', '.tgz', '.tar.bz2', '.tbz2', '.tar.xz', '.txz')
+_DECOMPRESSORS = [(b'\x1f\x8b', gzip.GzipFile), (b'BZh', bz2.BZ2File), (b'\xfd7zXZ\x00', lzma.LZMAFile)]
+
+class ArchiveLimitError(Exception):
+    """Raised when expanding an archive would exceed one of the configured limits."""
+
+    def __init__(self, message, fatal=False):
+        super().__init__(message)
+        self.fatal = fatal
+
+class ArchiveIncompleteError(OSError):
+    """Raised by iter_archive() after its last item when part of the archive could not be expanded."""
+
+def archive_kind(name):
+    """Returns 'zip', 'tar' or 'gz' for archive file names, otherwise None."""
+    name = name.lower()
+    if name.endswith('.zip'):
+        return 'zip'
+    if name.endswith(_TAR_SUFFIXES):
+        return 'tar'
+    if name.endswith('.gz'):
+        return 'gz'
+    return None
+
+class _Budget:
+    """Counts uncompressed bytes read across a whole run."""
+
+    def __init__(self, max_total_bytes):
+        self.max_total_bytes = max_total_bytes
+        self.used = 0
+
+    def charge(self, n):
+        self.used += n
+        if self.used > self.max_total_bytes:
+            raise ArchiveLimitError("total expanded size limit reached", fatal=True)
+
+class _GuardedReader(io.RawIOBase):
+    """Read-only wrapper that charges the run budget and optionally enforces a compression ratio.
+
+    The ratio compares the bytes read so far with how far the compressed
+    source has been consumed, so it holds however much is read ahead.
+    """
+
+    def __init__(self, raw, budget=None, compressed=None, max_ratio=None):
+        self.raw = raw
+        self.budget = budget
+        self.compressed = compressed
+        self.max_ratio = max_ratio
+        self.count = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        n = self.raw.readinto(buffer)
+        if n:
+            self.count += n
+            if self.max_ratio is not None and \
+                    self.count > max(self.compressed.tell(), RATIO_MIN_COMPRESSED) * self.max_ratio:
+                raise ArchiveLimitError("compression ratio limit exceeded")
+            if self.budget is not None:
+                self.budget.charge(n)
+        return n
+
+def _modified(timestamp):
+    return datetime.datetime.fromtimestamp(timestamp).strftime('%Y-%m-%d %H:%M:%S')
+
+def _decompressed(source, max_ratio):
+    """Returns a decompressed stream over a possibly compressed tar or gzip source.
+
+    Only the ratio is enforced here, unless max_ratio is None; the run
+    budget is charged per member.
+    """
+    magic = source.read(6)
+    source.seek(0)
+    for prefix, opener in _DECOMPRESSORS:
+        if magic.startswith(prefix):
+            return _GuardedReader(opener(fileobj=source), compressed=source, max_ratio=max_ratio)
+    return source
+
+def _members(source, kind, max_ratio):
+    """Yields (name, size or None, compressed size or None, modified, extra metadata, open function)."""
+    if kind == 'zip':
+        with zipfile.ZipFile(source, 'r') as archive:
+            for info in archive.infolist():
+                if info.is_dir():
+                    continue
+                modified = datetime.datetime(*info.date_time).strftime('%Y-%m-%d %H:%M:%S')
+                yield (info.filename, info.file_size, info.compress_size, modified, {"CRC32": f"{info.CRC:08x}"},
+                       lambda info=info: archive.open(info))
+    elif kind == 'tar':
+        # Stream mode reads members strictly in order, so the source need not be buffered.
+        with tarfile.open(fileobj=io.BufferedReader(_decompressed(source, max_ratio), BUFFER_SIZE),
+                          mode='r|') as archive:
+            for info in archive:
+                if info.isfile():
+                    yield (info.name, info.size, None, _modified(info.mtime), {},
+                           lambda info=info: archive.extractfile(info))
+    else:
+        # A plain .gz holds one file named like the archive without the suffix.
+        stream = _decompressed(source, max_ratio)
+        name = os.path.basename(getattr(source, 'name', None) or 'member.gz')
+        yield name[:-3] if name.lower().endswith('.gz') else name, None, None, '', {}, lambda: stream
+
+def _hash_and_buffer(stream, max_bytes, progress, algorithms):
+    """Hashes a stream and keeps a copy in memory unless it grows beyond max_bytes."""
+    hasher = MultiHasher(algorithms)
+    buffer = io.BytesIO()
+    while True:
+        chunk = stream.read(BUFFER_SIZE)
+        if not chunk:
+            break
+        hasher.update(chunk)
+        if buffer is not None:
+            if buffer.tell() + len(chunk) > max_bytes:
+                buffer = None
+            else:
+                buffer.write(chunk)
+        if progress:
+            progress(len(chunk), 0)
+    if buffer is not None:
+        buffer.seek(0)
+    return hasher.hexdigests(), buffer
+
+def _walk(source, kind, container, depth, options):
+    excluded_extensions, progress, algorithms, budget, max_depth, max_nested_bytes, max_ratio, skip = options
+    # The top-level archive is read from disk as it is; only what it holds is ratio-limited.
+    stream_ratio = max_ratio if depth > 0 else None
+    for name, size, compressed, modified, extra, open_member in _members(source, kind, stream_ratio):
+        if os.path.splitext(name)[1] in excluded_extensions:
+            continue
+        if depth == 0 and name in skip:
+            continue
+        path = container + name
+        metadata = {
+            "File Name": os.path.basename(name),
+            "File Size": size,
+            "File Path": path,
+            "Last Modified Time": modified or "Unknown",
+            "File Type/Extension": os.path.splitext(name)[1],
+        }
+        metadata.update(extra)
+        nested_kind = archive_kind(name)
+        if nested_kind and depth >= max_depth:
+            metadata["Nested Archive"] = "Not expanded (depth limit)"
+            nested_kind = None
+        elif nested_kind and size is not None and size > max_nested_bytes:
+            metadata["Nested Archive"] = "Not expanded (size limit)"
+            nested_kind = None
+
+        hashes, buffer, fatal = {}, None, None
+        over_ratio = compressed is not None and size > max(compressed, 1) * max_ratio
+        if over_ratio and depth == 0 and nested_kind:
+            # zipfile enforces a top-level member's declared size; the ratio only guards what is buffered.
+            metadata["Nested Archive"] = "Not expanded (compression ratio limit)"
+            nested_kind = None
+        if over_ratio and depth > 0:
+            metadata["Archive Check"] = "Skipped (compression ratio limit)"
+        else:
+            try:
+                with open_member() as raw:
+                    stream = _GuardedReader(raw, budget)
+                    if nested_kind:
+                        hashes, buffer = _hash_and_buffer(stream, max_nested_bytes, progress, algorithms)
+                        metadata["Nested Archive"] = "Expanded" if buffer is not None else "Not expanded (size limit)"
+                    else:
+                        chunk_size = max(min(BUFFER_SIZE, size), 1) if size is not None else BUFFER_SIZE
+                        hashes = hash_stream(stream, chunk_size, progress, algorithms)
+                    if size is None:
+                        metadata["File Size"] = stream.count
+                if kind == 'zip':
+                    metadata["CRC Check"] = "OK"
+            except zipfile.BadZipFile as e:
+                print(f"CRC check failed for {path}: {e}")
+                metadata["CRC Check"] = "MISMATCH"
+                hashes, buffer = {}, None
+            except ArchiveLimitError as e:
+                metadata["Archive Check"] = f"Skipped ({e})"
+                hashes, buffer = {}, None
+                if e.fatal:
+                    fatal = e
+        if metadata["File Size"] is None:
+            metadata["File Size"] = 0
+
+        if buffer is not None:
+            try:
+                buffer.name = name
+                yield from _walk(buffer, nested_kind, path + SEPARATOR, depth + 1, options)
+            except ArchiveLimitError as e:
+                metadata["Nested Archive"] = f"Incomplete ({e})"
+                if e.fatal:
+                    fatal = e
+            except (zipfile.BadZipFile, tarfile.TarError, EOFError, OSError, lzma.LZMAError) as e:
+                metadata["Nested Archive"] = f"Incomplete ({e})"
+        if progress:
+            progress(0, 1)
+        yield {"metadata": metadata, "hashes": hashes}
+        if fatal:
+            raise fatal
+
+def iter_archive(source, kind='zip', container='', excluded_extensions=None, progress=None, known_db=None,
+                 algorithms=None, max_depth=MAX_DEPTH, max_nested_bytes=MAX_NESTED_BYTES, max_ratio=MAX_RATIO,
+                 max_total_bytes=MAX_TOTAL_BYTES, skip=()):
+    """Yields a result item for every member of an archive, expanding nested archives.
+
+    source may be a path or a seekable binary file object; kind is 'zip',
+    'tar' or 'gz' (see archive_kind()). Member paths are prefixed with
+    container. Members that break a limit are still reported, with an
+    "Archive Check" note and no digests; once max_total_bytes is used up the
+    run stops after reporting the member that hit it. Top-level members named
+    in skip are passed over unread, e.g. when resuming an interrupted run.
+
+    Raises ArchiveIncompleteError after the last item if the archive, or a
+    nested archive in it, could not be expanded completely.
+    """
+    if excluded_extensions is None:
+        excluded_extensions = []
+    algorithms = resolve_algorithms(algorithms)
+    options = (excluded_extensions, progress, algorithms, _Budget(max_total_bytes), max_depth, max_nested_bytes,
+               max_ratio, skip)
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            yield from iter_archive(f, kind, container, excluded_extensions, progress, known_db, algorithms,
+                                    max_depth, max_nested_bytes, max_ratio, max_total_bytes, skip)
+        return
+    label = container.removesuffix(SEPARATOR) or 'archive'
+    incomplete = 0
+    try:
+        for item in _walk(source, kind, container, 0, options):
+            _tag_known(item["metadata"], item["hashes"], known_db)
+            if item["metadata"].get("Nested Archive", "").startswith("Incomplete"):
+                incomplete += 1
+            yield item
+    except (ArchiveLimitError, zipfile.BadZipFile, tarfile.TarError, EOFError, lzma.LZMAError) as e:
+        raise ArchiveIncompleteError(f"Stopped expanding {label}: {e}") from e
+    if incomplete:
+        raise ArchiveIncompleteError(f"{incomplete} nested archive(s) in {label} "
+                                     f"could not be expanded completely")
@@ -0,0 +1,226 @@
+# forensic_tool_web/benchmark.py
+
+"""Throughput benchmarks for the hashing engine and PDF reporting.
+
+Generates synthetic corpora, times each entry point in a fresh process and
+prints machine-readable JSON. Pass --baseline with an earlier output file to
+fail (exit code 1) when a throughput figure drops by more than --tolerance.
+
+    python benchmark.py --scale small --output bench.json
+    python benchmark.py --baseline bench.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import random
+import resource
+import shutil
+import sys
+import tempfile
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+
+SCALES = {
+    # huge file bytes, tiny file count, tiny file bytes, deep tree depth, files per level
+    'small': {'huge': 64 * 1024 * 1024, 'tiny': 2000, 'tiny_size': 2048, 'depth': 20, 'per_level': 10},
+    'full': {'huge': 2 * 1024 * 1024 * 1024, 'tiny': 50000, 'tiny_size': 4096, 'depth': 200, 'per_level': 25},
+}
+
+# Result fields where a higher value is better; these are compared to the baseline.
+THROUGHPUT_FIELDS = ('mb_per_s', 'files_per_s', 'pages_per_s')
+
+def _write_random(path, size, rng):
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining:
+            n = min(remaining, 1024 * 1024)
+            f.write(rng.randbytes(n))
+            remaining -= n
+
+def build_corpora(root, scale):
+    """Creates the synthetic corpora under root and returns their paths."""
+    params = SCALES[scale]
+    rng = random.Random(1337)  # Fixed seed so runs are comparable.
+
+    huge = os.path.join(root, 'huge.bin')
+    _write_random(huge, params['huge'], rng)
+
+    tiny_dir = os.path.join(root, 'tiny')
+    os.makedirs(tiny_dir)
+    for i in range(params['tiny']):
+        _write_random(os.path.join(tiny_dir, f"file{i:06d}.dat"), params['tiny_size'], rng)
+
+    deep_dir = os.path.join(root, 'deep')
+    level = deep_dir
+    for depth in range(params['depth']):
+        level = os.path.join(level, f"d{depth}")
+        os.makedirs(level)
+        for i in range(params['per_level']):
+            _write_random(os.path.join(level, f"f{i}.txt"), rng.randint(1, 64 * 1024), rng)
+
+    archive = os.path.join(root, 'tree.zip')
+    with zipfile.ZipFile(archive, 'w', zipfile.ZIP_DEFLATED) as zf:
+        for base in (tiny_dir, deep_dir):
+            for dirpath, _, files in os.walk(base):
+                for name in files:
+                    path = os.path.join(dirpath, name)
+                    zf.write(path, os.path.relpath(path, root))
+
+    return {'huge': huge, 'tiny': tiny_dir, 'deep': deep_dir, 'zip': archive}
+
+def _tree_stats(path):
+    files = 0
+    size = 0
+    for dirpath, _, names in os.walk(path):
+        for name in names:
+            files += 1
+            size += os.path.getsize(os.path.join(dirpath, name))
+    return files, size
+
+def _peak_rss_kb():
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is bytes on macOS and kilobytes on Linux.
+    return peak // 1024 if sys.platform == 'darwin' else peak
+
+def _run_case(case):
+    """Runs one benchmark case. Executed in a fresh process so peak RSS is per case."""
+    import hashing
+    kind = case['kind']
+    start = time.perf_counter()
+    if kind == 'hash_file':
+        hashing.hash_file(case['path'], algorithms=case['algorithms'])
+    elif kind == 'hash_directory':
+        hashing.hash_directory(case['path'], workers=case['workers'], algorithms=case['algorithms'])
+    elif kind == 'iter_archive':
+        from archives import iter_archive
+        for _ in iter_archive(case['path'], algorithms=case['algorithms']):
+            pass
+    elapsed = time.perf_counter() - start
+    if kind == 'pdf_report':
+        # Timed separately so the hashing needed for the input is not counted.
+        pages, elapsed = _build_report(case['path'], case['output'])
+
+    result = {'name': case['name'], 'seconds': round(elapsed, 4), 'peak_rss_kb': _peak_rss_kb()}
+    if kind == 'pdf_report':
+        result['pages'] = pages
+        result['pages_per_s'] = round(pages / elapsed, 2)
+    else:
+        result['mb_per_s'] = round(case['bytes'] / elapsed / (1024 * 1024), 2)
+        if case['files'] > 1:
+            result['files_per_s'] = round(case['files'] / elapsed, 2)
+    return result
+
+def _build_report(directory, output):
+    import hashing
+    from reporting import PDFReport
+    results, summary = hashing.hash_directory(directory, algorithms='court')
+    start = time.perf_counter()
+    pdf = PDFReport(output)
+    pdf.generate_cover_page({
+        "investigator_name": "Benchmark", "case_id": "BENCH-0001",
+        "case_description": "Synthetic benchmark corpus", "date_time": "1970-01-01 00:00:00"
+    })
+    pdf.add_hashing_results({'dir_results': {'results': results, 'summary': summary}})
+    pdf.save()
+    return pdf.doc.page, time.perf_counter() - start
+
+def build_cases(corpora, scratch):
+    import hashing
+    huge_size = os.path.getsize(corpora['huge'])
+    tiny_files, tiny_size = _tree_stats(corpora['tiny'])
+    deep_files, deep_size = _tree_stats(corpora['deep'])
+
+    cases = []
+    for alg in hashing.get_supported_algorithms():
+        cases.append({'name': f"hash_file/huge/{alg}", 'kind': 'hash_file', 'path': corpora['huge'],
+                      'algorithms': [alg], 'bytes': huge_size, 'files': 1})
+    for profile in hashing.ALGORITHM_PROFILES:
+        cases.append({'name': f"hash_file/huge/profile:{profile}", 'kind': 'hash_file', 'path': corpora['huge'],
+                      'algorithms': profile, 'bytes': huge_size, 'files': 1})
+    for label, files, size in (('tiny', tiny_files, tiny_size), ('deep', deep_files, deep_size)):
+        for mode, workers in (('serial', 1), ('parallel', None)):
+            cases.append({'name': f"hash_directory/{label}/{mode}", 'kind': 'hash_directory',
+                          'path': corpora[label], 'workers': workers, 'algorithms': 'full',
+                          'bytes': size, 'files': files})
+    cases.append({'name': "iter_archive/tree", 'kind': 'iter_archive', 'path': corpora['zip'], 'algorithms': 'full',
+                  'bytes': tiny_size + deep_size, 'files': tiny_files + deep_files})
+    try:
+        import reportlab  # noqa: F401
+        cases.append({'name': "pdf_report/deep", 'kind': 'pdf_report', 'path': corpora['deep'],
+                      'output': os.path.join(scratch, 'bench_report.pdf')})
+    except ImportError:
+        print("reportlab is not installed; skipping PDF benchmarks.", file=sys.stderr)
+    return cases
+
+def compare(results, baseline, tolerance):
+    """Returns a list of regressions of throughput fields against the baseline."""
+    previous = {r['name']: r for r in baseline.get('results', [])}
+    regressions = []
+    for result in results:
+        before = previous.get(result['name'])
+        if not before:
+            continue
+        for field in THROUGHPUT_FIELDS:
+            if field in result and before.get(field):
+                if result[field] < before[field] * (1 - tolerance):
+                    regressions.append({'name': result['name'], 'field': field,
+                                        'baseline': before[field], 'current': result[field]})
+    return regressions
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark hashing and report generation.")
+    parser.add_argument('--scale', choices=sorted(SCALES), default='small')
+    parser.add_argument('--only', help="Run only cases whose name contains this text")
+    parser.add_argument('--output', help="Write JSON results to this file instead of stdout")
+    parser.add_argument('--baseline', help="Earlier JSON output to compare against")
+    parser.add_argument('--tolerance', type=float, default=0.10,
+                        help="Allowed relative throughput drop before failing (default 0.10)")
+    parser.add_argument('--workdir', help="Directory for the synthetic corpora (default: a temp dir)")
+    args = parser.parse_args()
+
+    scratch = tempfile.mkdtemp(prefix='fhx-bench-', dir=args.workdir)
+    try:
+        corpora = build_corpora(scratch, args.scale)
+        cases = build_cases(corpora, scratch)
+        if args.only:
+            cases = [c for c in cases if args.only in c['name']]
+        results = []
+        spawn = multiprocessing.get_context('spawn')
+        for case in cases:
+            with ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+                result = pool.submit(_run_case, case).result()
+            print(f"{result['name']}: {result['seconds']}s", file=sys.stderr)
+            results.append(result)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    report = {
+        'scale': args.scale,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpu_count': os.cpu_count(),
+        },
+        'results': results,
+    }
+    exit_code = 0
+    if args.baseline:
+        with open(args.baseline) as f:
+            report['regressions'] = compare(results, json.load(f), args.tolerance)
+        exit_code = 1 if report['regressions'] else 0
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return exit_code
+
+if __name__ == '__main__':
+    sys.exit(main())
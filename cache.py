@@ -0,0 +1,139 @@
+# forensic_tool_web/cache.py
+
+import hashlib
+import json
+import os
+import time
+
+import sqlite_util
+
+TRUST = 'trust'
+VERIFY = 'verify'
+
+# Bytes read from each end of a file for the optional identity sample.
+SAMPLE_SIZE = 4096
+
+# Inserts between checks of the size bound; counting rows is not free.
+EVICT_CHECK_INTERVAL = 1000
+
+class HashCache:
+    """On-disk cache of file digests keyed by file identity.
+
+    A file's identity is (device, inode, size, mtime_ns) plus, optionally, a
+    digest of its first and last SAMPLE_SIZE bytes. In TRUST mode a matching
+    identity returns the stored digests without reading the file. In VERIFY
+    mode every file is read in full and the cache is only refreshed, which is
+    what forensic runs should use.
+    """
+
+    def __init__(self, db_path, mode=TRUST, max_entries=1_000_000, sample=False):
+        if mode not in (TRUST, VERIFY):
+            raise ValueError(f"Unknown cache mode: {mode}")
+        self.db_path = db_path
+        self.mode = mode
+        self.max_entries = max_entries
+        self.sample = sample
+        self._puts = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS hashes ("
+                " dev INTEGER NOT NULL, ino INTEGER NOT NULL, size INTEGER NOT NULL,"
+                " mtime_ns INTEGER NOT NULL, sample TEXT, path TEXT NOT NULL,"
+                " digests TEXT NOT NULL, last_used REAL NOT NULL,"
+                " PRIMARY KEY (dev, ino))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS hashes_last_used ON hashes (last_used)")
+            conn.execute("CREATE INDEX IF NOT EXISTS hashes_path ON hashes (path)")
+
+    @property
+    def trusted(self):
+        return self.mode == TRUST
+
+    def _connect(self):
+        return sqlite_util.connect(self.db_path)
+
+    def identity(self, f, st):
+        """Returns the cache key for an open file and its stat result."""
+        sample = None
+        if self.sample:
+            h = hashlib.blake2b(digest_size=16)
+            h.update(os.pread(f.fileno(), SAMPLE_SIZE, 0))
+            if st.st_size > SAMPLE_SIZE:
+                h.update(os.pread(f.fileno(), SAMPLE_SIZE, max(st.st_size - SAMPLE_SIZE, SAMPLE_SIZE)))
+            sample = h.hexdigest()
+        return (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns, sample)
+
+    def get(self, key, algorithms):
+        """Returns cached digests for the given algorithms, or None on a miss."""
+        dev, ino, size, mtime_ns, sample = key
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT size, mtime_ns, sample, digests FROM hashes WHERE dev = ? AND ino = ?",
+            (dev, ino)
+        ).fetchone()
+        if row is None or tuple(row[:3]) != (size, mtime_ns, sample):
+            return None
+        digests = json.loads(row[3])
+        wanted = [alg.upper() for alg in algorithms]
+        if any(alg not in digests for alg in wanted):
+            return None
+        with conn:
+            conn.execute("UPDATE hashes SET last_used = ? WHERE dev = ? AND ino = ?", (time.time(), dev, ino))
+        return {alg: digests[alg] for alg in wanted}
+
+    def put(self, key, path, digests):
+        """Stores freshly computed digests, merging with any for the same identity."""
+        dev, ino, size, mtime_ns, sample = key
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT size, mtime_ns, sample, digests FROM hashes WHERE dev = ? AND ino = ?",
+            (dev, ino)
+        ).fetchone()
+        merged = dict(digests)
+        if row is not None and tuple(row[:3]) == (size, mtime_ns, sample):
+            previous = json.loads(row[3])
+            changed = [alg for alg in digests if alg in previous and previous[alg] != digests[alg]]
+            if changed:
+                print(f"Warning: {path} changed content without changing size or mtime ({', '.join(changed)})")
+            else:
+                merged = {**previous, **digests}
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO hashes (dev, ino, size, mtime_ns, sample, path, digests, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (dev, ino, size, mtime_ns, sample, os.path.abspath(path), json.dumps(merged), time.time())
+            )
+        self._puts += 1
+        if self._puts % EVICT_CHECK_INTERVAL == 1:
+            self._evict(conn)
+
+    def _evict(self, conn):
+        """Drops the least recently used entries once the cache is over its size bound."""
+        count = conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        # Evict a little extra so this does not run on every insert.
+        excess = count - self.max_entries + max(self.max_entries // 100, 1)
+        with conn:
+            conn.execute(
+                "DELETE FROM hashes WHERE rowid IN"
+                " (SELECT rowid FROM hashes ORDER BY last_used LIMIT ?)",
+                (excess,)
+            )
+
+    def invalidate(self, path):
+        """Forgets the cached digests for a file, or for every file under a directory."""
+        path = os.path.abspath(path)
+        prefix = path.rstrip(os.sep) + os.sep
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "DELETE FROM hashes WHERE path = ? OR substr(path, 1, ?) = ?",
+                (path, len(prefix), prefix)
+            )
+
+    def clear(self):
+        """Empties the cache."""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM hashes")
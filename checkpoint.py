@@ -0,0 +1,154 @@
+# forensic_tool_web/checkpoint.py
+
+"""Resumable hashing runs.
+
+Directory runs append each finished file to a JSON Lines checkpoint, so a
+restarted run only hashes files that are not in it (or whose size or mtime
+changed since). hashlib objects cannot be serialised, so a long single-file
+run cannot resume a whole-file digest; it falls back to per-block digests
+(see piecewise.py) and appends them to its checkpoint as they complete.
+
+A checkpoint only describes an interrupted run: it is removed once the run
+finishes, so it never turns into a cache that is trusted without reading
+the files again.
+"""
+
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from hashing import _tag_known, add_to_summary, hash_file, resolve_algorithms
+from piecewise import DEFAULT_ALGORITHM, DEFAULT_BLOCK_SIZE, _BlockReader, _block_count, merkle_root
+from walker import walk_files
+
+# Blocks hashed between checkpoint writes, per worker thread.
+BLOCKS_PER_CHECKPOINT = 4
+
+def _load_directory_checkpoint(checkpoint_path):
+    done = {}
+    if not os.path.exists(checkpoint_path):
+        return done
+    with open(checkpoint_path, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                # A line cut short by the crash; that file is simply hashed again.
+                continue
+            done[record['path']] = record
+    return done
+
+def resumable_hash_directory(directory_path, checkpoint_path, excluded_extensions=None, progress=None,
+                             cache=None, algorithms=None, keep_checkpoint=False, known_db=None, rules=None):
+    """Hashes a directory like hash_directory(), recording each finished file in checkpoint_path.
+
+    Files already in the checkpoint with the same size, mtime and algorithms
+    are not read again. The checkpoint is removed when the run completes.
+    Returns (results, summary) in walk_files() order.
+    """
+    from utils import file_metadata
+    algorithms = resolve_algorithms(algorithms)
+    names = sorted(alg.upper() for alg in algorithms)
+    done = _load_directory_checkpoint(checkpoint_path)
+
+    results = []
+    summary = {"Total Files Processed": 0, "Total Directory Size": 0}
+    with open(checkpoint_path, 'a', encoding='utf-8') as log:
+        for entry in walk_files(directory_path, excluded_extensions, rules):
+            record = done.get(entry.path)
+            if (record and record['size'] == entry.size and record['mtime_ns'] == entry.mtime_ns
+                    and sorted(record['item']['hashes']) == names):
+                item = record['item']
+                if progress:
+                    progress(entry.size, 0)
+            else:
+                hashes = hash_file(entry.path, progress=progress, cache=cache, algorithms=algorithms)
+                if not hashes:
+                    continue
+                item = {"metadata": file_metadata(entry.path, entry.size, entry.mtime), "hashes": hashes}
+                log.write(json.dumps({"path": entry.path, "size": entry.size, "mtime_ns": entry.mtime_ns,
+                                      "item": item}) + '\n')
+                log.flush()
+            if progress:
+                progress(0, 1)
+            # Tagged on every run, so a changed known-hash database is always applied.
+            item["metadata"].pop("Known Status", None)
+            _tag_known(item["metadata"], item["hashes"], known_db)
+            results.append(item)
+            add_to_summary(summary, item)
+    if not keep_checkpoint:
+        os.remove(checkpoint_path)
+    return results, summary
+
+def _load_block_checkpoint(checkpoint_path, identity):
+    """Returns the block digests recorded for identity, or None if there is no usable checkpoint."""
+    if not os.path.exists(checkpoint_path):
+        return None
+    blocks = []
+    with open(checkpoint_path, 'r', encoding='utf-8') as cp:
+        try:
+            if json.loads(cp.readline()).get("identity") != identity:
+                return None
+        except ValueError:
+            return None
+        for line in cp:
+            try:
+                blocks.append(json.loads(line))
+            except ValueError:
+                # A line cut short by the crash; that block is hashed again.
+                break
+    return blocks
+
+def _start_block_checkpoint(checkpoint_path, identity, blocks):
+    # Write-then-rename, so a crash mid-write leaves the previous checkpoint intact.
+    tmp_path = checkpoint_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(json.dumps({"identity": identity}) + '\n')
+        f.writelines(json.dumps(digest) + '\n' for digest in blocks)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, checkpoint_path)
+
+def resumable_hash_pieces(file_path, checkpoint_path, block_size=DEFAULT_BLOCK_SIZE, algorithm=DEFAULT_ALGORITHM,
+                          workers=None, progress=None, keep_checkpoint=False):
+    """Block-hashes a large file, checkpointing the completed offset so a restart carries on.
+
+    The checkpoint is discarded if the file's size or mtime changed, or if
+    the block size or algorithm differ. Returns the same structure as
+    piecewise.hash_pieces().
+    """
+    workers = workers or os.cpu_count() or 1
+    with open(file_path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        identity = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "block_size": block_size, "algorithm": algorithm}
+
+        total = _block_count(st.st_size, block_size)
+        blocks = (_load_block_checkpoint(checkpoint_path, identity) or [])[:total]
+        if blocks and progress:
+            progress(min(len(blocks) * block_size, st.st_size), 0)
+        # Rewritten once, dropping anything unreadable; after that new digests are only appended.
+        _start_block_checkpoint(checkpoint_path, identity, blocks)
+
+        reader = _BlockReader(f.fileno(), block_size, algorithm)
+        step = workers * BLOCKS_PER_CHECKPOINT
+        with ThreadPoolExecutor(max_workers=workers) as pool, \
+                open(checkpoint_path, 'a', encoding='utf-8') as log:
+            while len(blocks) < total:
+                indexes = range(len(blocks), min(len(blocks) + step, total))
+                digests = list(pool.map(reader.digest, indexes))
+                blocks.extend(digests)
+                log.writelines(json.dumps(digest) + '\n' for digest in digests)
+                log.flush()
+                os.fsync(log.fileno())
+                if progress:
+                    progress(min(len(indexes) * block_size, st.st_size - indexes[0] * block_size), 0)
+
+    if not keep_checkpoint and os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+    return {
+        "algorithm": algorithm,
+        "block_size": block_size,
+        "size": st.st_size,
+        "blocks": blocks,
+        "merkle_root": merkle_root(blocks, algorithm),
+    }
@@ -0,0 +1,213 @@
+# forensic_tool_web/cli.py
+
+"""Command-line hashing of local files, directories and archives.
+
+Uses the same engine as the web app without going through Flask, so local
+evidence does not need to be zipped and uploaded. The manifest is written
+while hashing runs; reportlab is only imported when a PDF is requested.
+
+    python cli.py /mnt/evidence image.dd --profile court --workers 4 -o case.csv --pdf case.pdf
+"""
+
+import argparse
+import contextlib
+import datetime
+import os
+import sys
+import tempfile
+
+from hashing import ALGORITHM_PROFILES, add_to_summary, hash_image, iter_directory, resolve_algorithms
+from manifest import FORMATS, iter_manifest
+from utils import get_file_metadata
+
+def _checkpoint_path(args, index):
+    """Checkpoint file of the index-th target: --checkpoint itself for a single target, else <checkpoint>.<index>."""
+    if len(args.targets) == 1:
+        return args.checkpoint
+    return f"{args.checkpoint}.{index}"
+
+def _iter_target(target, index, args, algorithms, cache, known_db):
+    """Yields result items for the index-th command-line target."""
+    if os.path.isdir(target):
+        if args.dedupe:
+            from dedup import hash_directory_dedup
+            results, _ = hash_directory_dedup(target, args.exclude, cache=cache, known_db=known_db,
+                                              algorithms=algorithms, rules=args.rules)
+            yield from results
+        elif args.checkpoint:
+            from checkpoint import resumable_hash_directory
+            results, _ = resumable_hash_directory(target, _checkpoint_path(args, index), args.exclude, cache=cache,
+                                                  algorithms=algorithms, known_db=known_db, rules=args.rules)
+            yield from results
+        else:
+            yield from iter_directory(target, args.exclude, args.workers, cache=cache, known_db=known_db,
+                                      algorithms=algorithms, rules=args.rules)
+        return
+
+    if args.expand_archives:
+        from archives import SEPARATOR, archive_kind, iter_archive
+        kind = archive_kind(target)
+        if kind:
+            yield from iter_archive(target, kind, os.path.abspath(target) + SEPARATOR, args.exclude,
+                                    known_db=known_db, algorithms=algorithms, max_depth=args.nested_depth)
+            return
+
+    metadata = get_file_metadata(target)
+    # Single files are often disk images; holes in sparse ones are not read.
+    result = hash_image(target, cache=cache, algorithms=algorithms) if metadata else None
+    if not result:
+        raise OSError(f"Could not hash {target}")
+    hashes, info = result
+    # Block devices and pipes report a size of 0; use what was actually hashed.
+    metadata["File Size"] = info["Logical Size"]
+    if info["Allocated Size"] < info["Logical Size"]:
+        metadata["Allocated Size"] = info["Allocated Size"]
+    if known_db is not None:
+        metadata["Known Status"] = known_db.classify(hashes)
+    yield {"metadata": metadata, "hashes": hashes}
+
+def _iter_all(args, algorithms, cache, known_db, summary, failures, store, result_id):
+    batch = []
+    for index, target in enumerate(args.targets):
+        try:
+            for item in _iter_target(target, index, args, algorithms, cache, known_db):
+                add_to_summary(summary, item)
+                if store is not None:
+                    batch.append(item)
+                    if len(batch) >= 200:
+                        store.append(result_id, batch)
+                        batch = []
+                yield item
+        except OSError as e:
+            print(f"Error: {e}", file=sys.stderr)
+            failures.append(target)
+    if store is not None:
+        store.append(result_id, batch)
+
+def _write_pdf(args, store, result_id, summary):
+    from reporting import PDFReport
+    store.finish(result_id, summary=summary)
+    report_data = store.load_report_data(result_id)
+    pdf = PDFReport(args.pdf)
+    pdf.generate_cover_page({
+        "investigator_name": args.investigator,
+        "case_id": args.case_id,
+        "case_description": args.description or ', '.join(args.targets),
+        "date_time": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+    })
+    pdf.add_hashing_results(report_data)
+    pdf.save()
+
+def _manifest_root(targets):
+    """Directory that manifest paths are written relative to, so the manifest can be verified against it.
+
+    That is the target itself for a single directory, otherwise the
+    closest directory holding all targets.
+    """
+    dirs = [os.path.abspath(t) if os.path.isdir(t) else os.path.dirname(os.path.abspath(t)) for t in targets]
+    return os.path.commonpath(dirs)
+
+def _timestamp(value):
+    """argparse type for --newer/--older: an ISO date or date and time."""
+    try:
+        return datetime.datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"not an ISO date: {value}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Hash local files, directories and archives.")
+    parser.add_argument('targets', nargs='+', help="Files or directories to hash")
+    parser.add_argument('--profile', default='full',
+                        help=f"Algorithm profile ({', '.join(ALGORITHM_PROFILES)}) or comma-separated algorithms")
+    parser.add_argument('--workers', type=int, default=1,
+                        help="Processes per directory; 0 means one per CPU")
+    parser.add_argument('--exclude', action='append', default=[], metavar='EXT',
+                        help="File extension to skip, e.g. .tmp (repeatable)")
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help="Only hash files whose name or relative path matches (repeatable)")
+    parser.add_argument('--exclude-glob', action='append', metavar='GLOB',
+                        help="Skip files whose name or relative path matches (repeatable)")
+    parser.add_argument('--min-size', type=int, help="Skip files smaller than this many bytes")
+    parser.add_argument('--max-size', type=int, help="Skip files larger than this many bytes")
+    parser.add_argument('--newer', type=_timestamp, help="Skip files last modified before this date")
+    parser.add_argument('--older', type=_timestamp, help="Skip files last modified after this date")
+    parser.add_argument('--format', choices=sorted(FORMATS), default='jsonl', help="Manifest format")
+    parser.add_argument('-o', '--output', default='-', help="Manifest file, or - for standard output")
+    parser.add_argument('--cache', help="Hash cache database to reuse digests of unchanged files")
+    parser.add_argument('--cache-mode', choices=['trust', 'verify'], default='trust',
+                        help="trust: reuse cached digests of unchanged files; verify: read every file and "
+                             "only refresh the cache")
+    parser.add_argument('--known-db', help="Known-hash database directory built with knownhash.py")
+    parser.add_argument('--dedupe', action='store_true', help="Hash identical directory files only once")
+    parser.add_argument('--checkpoint', help="Checkpoint file that lets an interrupted directory run resume; "
+                                             "with several targets each uses <checkpoint>.<n>, n counting from 0")
+    parser.add_argument('--expand-archives', action='store_true', help="Hash the members of archive targets")
+    parser.add_argument('--nested-depth', type=int, default=3, help="Nested archive levels to expand")
+    parser.add_argument('--pdf', help="Also write a PDF report to this path")
+    parser.add_argument('--case-id', default='', help="Case ID for the PDF cover page")
+    parser.add_argument('--investigator', default='', help="Investigator name for the PDF cover page")
+    parser.add_argument('--description', default='', help="Case description for the PDF cover page")
+    args = parser.parse_args(argv)
+
+    try:
+        algorithms = resolve_algorithms(args.profile)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.dedupe and args.checkpoint:
+        parser.error("--dedupe and --checkpoint cannot be combined")
+    if args.checkpoint and not all(os.path.isdir(target) for target in args.targets):
+        parser.error("--checkpoint only applies to directory targets")
+    if (args.dedupe or args.checkpoint) and args.workers != 1:
+        parser.error("--workers is not supported with --dedupe or --checkpoint")
+    if args.workers == 0:
+        args.workers = None
+    algorithm_names = [alg.upper() for alg in algorithms]
+    args.rules = None
+    if any(v is not None for v in (args.include, args.exclude_glob, args.min_size, args.max_size, args.newer,
+                                   args.older)):
+        from walker import WalkRules
+        args.rules = WalkRules(args.include, args.exclude_glob, args.min_size, args.max_size, args.newer, args.older)
+
+    cache = None
+    if args.cache:
+        from cache import HashCache
+        cache = HashCache(args.cache, mode=args.cache_mode)
+    known_db = None
+    if args.known_db:
+        from knownhash import KnownHashDB
+        known_db = KnownHashDB(args.known_db)
+
+    store = result_id = tmp_dir = None
+    if args.pdf:
+        # Results are kept on disk for the report, so memory does not grow with the case.
+        from resultstore import ResultStore
+        tmp_dir = tempfile.TemporaryDirectory()
+        store = ResultStore(os.path.join(tmp_dir.name, 'results.db'))
+        result_id = store.create('directory', {'algorithms': algorithm_names})
+
+    summary = {"Total Files Processed": 0, "Total Directory Size": 0}
+    if args.dedupe:
+        summary.update({"Unique Contents": 0, "Duplicate Groups": 0, "Duplicate Files": 0})
+    failures = []
+    items = _iter_all(args, algorithms, cache, known_db, summary, failures, store, result_id)
+    out = sys.stdout if args.output == '-' else open(args.output, 'w', encoding='utf-8', newline='')
+    try:
+        # The engine prints per-file errors; keep them out of a manifest written to stdout.
+        with contextlib.redirect_stdout(sys.stderr):
+            for chunk in iter_manifest(items, args.format, algorithm_names, _manifest_root(args.targets)):
+                out.write(chunk)
+    except ValueError as e:
+        parser.error(str(e))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    if args.pdf:
+        _write_pdf(args, store, result_id, summary)
+        tmp_dir.cleanup()
+    print(f"Hashed {summary['Total Files Processed']} files ({summary['Total Directory Size']} bytes); "
+          f"{len(failures)} targets failed.", file=sys.stderr)
+    return 1 if failures else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
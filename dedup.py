@@ -0,0 +1,142 @@
+# forensic_tool_web/dedup.py
+
+"""Directory hashing that computes the full digest set once per unique content.
+
+Files are narrowed down in three cheap-to-expensive passes: by size, by a
+fingerprint of the first and last FINGERPRINT_BYTES, and finally by a full
+BLAKE2b digest. Only the first file of each content group is hashed with
+every requested algorithm; its identical copies are listed under
+"duplicates" instead of being reported again.
+"""
+
+import hashlib
+
+from hashing import _collect_files, _tag_known, add_to_summary, hash_file, resolve_algorithms
+
+# Bytes read from each end of a file for the fingerprint pass.
+FINGERPRINT_BYTES = 64 * 1024
+# Digest used to confirm that fingerprint matches really have identical content.
+CONFIRM_ALGORITHM = 'blake2b'
+
+def _fingerprint(file_path, size):
+    """Returns a digest of the size, head and tail of a file, or None if it cannot be read."""
+    digest = hashlib.blake2b(size.to_bytes(8, 'little'))
+    try:
+        with open(file_path, 'rb') as f:
+            digest.update(f.read(FINGERPRINT_BYTES))
+            if size > FINGERPRINT_BYTES:
+                f.seek(max(size - FINGERPRINT_BYTES, FINGERPRINT_BYTES))
+                digest.update(f.read(FINGERPRINT_BYTES))
+    except OSError as e:
+        print(f"Error fingerprinting file {file_path}: {e}")
+        return None
+    return digest.hexdigest()
+
+def _group(entries, key):
+    groups = {}
+    for entry in entries:
+        groups.setdefault(key(entry), []).append(entry)
+    return groups.values()
+
+def find_candidate_groups(entries):
+    """Splits (index, path, size, mtime) entries into lists that may share content.
+
+    Returns (singletons, groups): singletons cannot have a copy; each group
+    shares a size and fingerprint. A group of files no larger than two
+    fingerprint windows is already known to be identical.
+    """
+    singletons, groups = [], []
+    for same_size in _group(entries, lambda e: e[2]):
+        if len(same_size) == 1:
+            singletons.extend(same_size)
+            continue
+        fingerprints = {entry: _fingerprint(entry[1], entry[2]) for entry in same_size}
+        for same_print in _group(same_size, fingerprints.get):
+            if len(same_print) == 1 or fingerprints[same_print[0]] is None:
+                singletons.extend(same_print)
+            else:
+                groups.append(same_print)
+    return singletons, groups
+
+def hash_directory_dedup(directory_path, excluded_extensions=None, progress=None, cache=None, known_db=None,
+                         algorithms=None, rules=None):
+    """Hashes a directory like hash_directory(), but each unique content only once.
+
+    Each result item gains a "duplicates" list with the metadata of its
+    identical copies, in walk_files() order. The summary still counts every file
+    and adds "Unique Contents", "Duplicate Groups" and "Duplicate Files".
+    """
+    from utils import file_metadata
+    if excluded_extensions is None:
+        excluded_extensions = []
+    algorithms = resolve_algorithms(algorithms)
+    confirm_name = CONFIRM_ALGORITHM.upper()
+    # The confirming digest is computed alongside the others for each first copy.
+    with_confirm = algorithms if CONFIRM_ALGORITHM in algorithms else algorithms + [CONFIRM_ALGORITHM]
+
+    entries = _collect_files(directory_path, excluded_extensions, rules)
+    singletons, groups = find_candidate_groups(entries)
+
+    # index -> item for each first copy; index -> first copy's index for the rest.
+    unique = {}
+    copy_of = {}
+
+    def hash_full(entry, algs):
+        hashes = hash_file(entry[1], progress=progress, cache=cache, algorithms=algs)
+        if progress:
+            progress(0, 1)
+        return file_metadata(*entry[1:]), hashes
+
+    for entry in singletons:
+        metadata, hashes = hash_full(entry, algorithms)
+        if hashes:
+            unique[entry[0]] = {"metadata": metadata, "hashes": hashes}
+
+    for group in groups:
+        small = group[0][2] <= 2 * FINGERPRINT_BYTES
+        # confirm digest -> index of the first copy with that content
+        firsts = {}
+        for entry in group:
+            if small and firsts:
+                # The fingerprint covered the whole file, so this is a copy.
+                copy_of[entry[0]] = (next(iter(firsts.values())), file_metadata(*entry[1:]))
+                if progress:
+                    progress(entry[2], 1)
+                continue
+            if firsts:
+                confirm = hash_file(entry[1], progress=progress, cache=cache, algorithms=[CONFIRM_ALGORITHM])
+                if confirm and confirm[confirm_name] in firsts:
+                    copy_of[entry[0]] = (firsts[confirm[confirm_name]], file_metadata(*entry[1:]))
+                    if progress:
+                        progress(0, 1)
+                    continue
+            metadata, hashes = hash_full(entry, with_confirm)
+            if not hashes:
+                continue
+            firsts[hashes[confirm_name]] = entry[0]
+            if CONFIRM_ALGORITHM not in algorithms:
+                del hashes[confirm_name]
+            unique[entry[0]] = {"metadata": metadata, "hashes": hashes}
+
+    for index in sorted(copy_of):
+        first, metadata = copy_of[index]
+        unique[first].setdefault("duplicates", []).append(metadata)
+
+    results = []
+    summary = {"Total Files Processed": 0, "Total Directory Size": 0,
+               "Unique Contents": 0, "Duplicate Groups": 0, "Duplicate Files": 0}
+    for index in sorted(unique):
+        item = unique[index]
+        _tag_known(item["metadata"], item["hashes"], known_db)
+        results.append(item)
+        add_to_summary(summary, item)
+    return results, summary
+
+def expand_duplicates(items):
+    """Yields one item per file, repeating the digests of a first copy for each of its duplicates."""
+    for item in items:
+        yield item
+        for metadata in item.get("duplicates", ()):
+            if "Known Status" in item["metadata"]:
+                metadata = dict(metadata, **{"Known Status": item["metadata"]["Known Status"]})
+            yield {"metadata": metadata, "hashes": item["hashes"]}
@@ -0,0 +1,297 @@
+# forensic_tool_web/fuzzy.py
+
+"""Context-triggered piecewise (ssdeep-style) fuzzy hashing and a similarity index.
+
+Digests use the ssdeep format "blocksize:chunk:double_chunk" and compare
+with ssdeep's 0-100 score. The ssdeep package is used when it is
+installed; otherwise a pure-Python implementation of the same algorithm
+produces identical digests, but only for inputs up to PURE_PYTHON_MAX_BYTES
+because it is far slower.
+
+SimilarityIndex stores digests in SQLite keyed by the 7-character
+substrings of their chunks. Two digests can only score above zero if
+they share such a substring at a compatible block size, so a search
+looks up those keys and scores only the few candidates instead of
+comparing against every entry.
+"""
+
+import argparse
+import os
+
+import sqlite_util
+
+try:
+    import ssdeep as _ssdeep
+except ImportError:
+    _ssdeep = None
+
+# Whether digests come from the ssdeep package rather than the pure-Python fallback.
+NATIVE = _ssdeep is not None
+
+ALGORITHM = 'ssdeep'
+# Largest input the pure-Python implementation hashes; larger inputs get no fuzzy digest.
+PURE_PYTHON_MAX_BYTES = 16 * 1024 * 1024
+
+ROLLING_WINDOW = 7
+MIN_BLOCKSIZE = 3
+SPAMSUM_LENGTH = 64
+HASH_PRIME = 0x01000193
+HASH_INIT = 0x28021967
+B64 = 'ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/'
+_B64_VALUE = {c: i for i, c in enumerate(B64)}
+
+def _spamsum(data):
+    """Pure-Python ssdeep digest of a bytes-like object."""
+    size = len(data)
+    block_size = MIN_BLOCKSIZE
+    while block_size * SPAMSUM_LENGTH < size:
+        block_size *= 2
+    while True:
+        # Rolling hash state (h1, h2, h3 and the window) and the two piece hashes.
+        window = [0] * ROLLING_WINDOW
+        r1 = r2 = r3 = 0
+        n = 0
+        h1 = h2 = HASH_INIT
+        sig1, sig2 = [], []
+        double = block_size * 2
+        rh = 0
+        for c in data:
+            h1 = ((h1 * HASH_PRIME) & 0xFFFFFFFF) ^ c
+            h2 = ((h2 * HASH_PRIME) & 0xFFFFFFFF) ^ c
+            r2 = (r2 - r1 + ROLLING_WINDOW * c) & 0xFFFFFFFF
+            r1 = (r1 + c - window[n]) & 0xFFFFFFFF
+            window[n] = c
+            n = n + 1 if n < ROLLING_WINDOW - 1 else 0
+            r3 = ((r3 << 5) & 0xFFFFFFFF) ^ c
+            rh = (r1 + r2 + r3) & 0xFFFFFFFF
+            if rh % block_size == block_size - 1:
+                if len(sig1) < SPAMSUM_LENGTH - 1:
+                    sig1.append(B64[h1 % 64])
+                    h1 = HASH_INIT
+                if rh % double == double - 1:
+                    if len(sig2) < SPAMSUM_LENGTH // 2 - 1:
+                        sig2.append(B64[h2 % 64])
+                        h2 = HASH_INIT
+        if rh != 0:
+            sig1.append(B64[h1 % 64])
+            sig2.append(B64[h2 % 64])
+        if block_size > MIN_BLOCKSIZE and len(sig1) < SPAMSUM_LENGTH // 2:
+            block_size //= 2
+            continue
+        return f"{block_size}:{''.join(sig1)}:{''.join(sig2)}"
+
+def fuzzy_hash(data):
+    """Returns the ssdeep digest of bytes, or None if the input is too large to hash here."""
+    if _ssdeep is not None:
+        return _ssdeep.hash(bytes(data))
+    if len(data) > PURE_PYTHON_MAX_BYTES:
+        return None
+    return _spamsum(data)
+
+class FuzzyHasher:
+    """hashlib-style object for the hashing engine, so ssdeep can be selected like any algorithm.
+
+    Without the ssdeep package the input is buffered (up to
+    PURE_PYTHON_MAX_BYTES) and hashed when the digest is read;
+    hexdigest() then returns an empty string for larger inputs.
+    """
+    name = ALGORITHM
+
+    def __init__(self):
+        self._native = _ssdeep.Hash() if _ssdeep is not None else None
+        self._buffer = bytearray()
+        self._too_large = False
+        self._fed = False
+
+    def update(self, data):
+        self._fed = True
+        if self._native is not None:
+            self._native.update(bytes(data))
+        elif not self._too_large:
+            if len(self._buffer) + len(data) > PURE_PYTHON_MAX_BYTES:
+                self._too_large = True
+                self._buffer = bytearray()
+            else:
+                # Copied: the engine reuses its read buffers.
+                self._buffer += data
+
+    def copy(self):
+        clone = FuzzyHasher()
+        if self._native is not None:
+            if self._fed:
+                raise ValueError("The ssdeep package's hasher cannot be copied once it has data.")
+            return clone
+        clone._buffer = bytearray(self._buffer)
+        clone._too_large = self._too_large
+        return clone
+
+    def hexdigest(self):
+        if self._native is not None:
+            return self._native.digest()
+        return '' if self._too_large else _spamsum(self._buffer)
+
+def _split(digest):
+    block_size, chunk, double_chunk = digest.split(':', 2)
+    return int(block_size), chunk, double_chunk
+
+def _squeeze(chunk):
+    """Drops characters repeated more than three times in a row, as ssdeep does before comparing."""
+    out = []
+    for c in chunk:
+        if len(out) < 3 or not (out[-1] == out[-2] == out[-3] == c):
+            out.append(c)
+    return ''.join(out)
+
+def _has_common_substring(s1, s2):
+    grams = {s1[i:i + ROLLING_WINDOW] for i in range(len(s1) - ROLLING_WINDOW + 1)}
+    return any(s2[i:i + ROLLING_WINDOW] in grams for i in range(len(s2) - ROLLING_WINDOW + 1))
+
+def _edit_distance(s1, s2):
+    """Edit distance with insert/delete cost 1 and substitution cost 2, as in ssdeep."""
+    previous = list(range(len(s2) + 1))
+    for i, c1 in enumerate(s1, 1):
+        current = [i]
+        for j, c2 in enumerate(s2, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (0 if c1 == c2 else 2)))
+        previous = current
+    return previous[-1]
+
+def _score_strings(s1, s2, block_size):
+    if not _has_common_substring(s1, s2):
+        return 0
+    score = _edit_distance(s1, s2) * SPAMSUM_LENGTH // (len(s1) + len(s2))
+    score = 100 * score // SPAMSUM_LENGTH
+    if score >= 100:
+        return 0
+    score = 100 - score
+    # Short digests of small inputs cannot justify a high score.
+    if block_size < (99 + ROLLING_WINDOW) // ROLLING_WINDOW * MIN_BLOCKSIZE:
+        score = min(score, block_size // MIN_BLOCKSIZE * min(len(s1), len(s2)))
+    return score
+
+def compare(digest1, digest2):
+    """Returns ssdeep's similarity score (0-100) for two digests."""
+    if _ssdeep is not None:
+        return _ssdeep.compare(digest1, digest2)
+    bs1, a1, b1 = _split(digest1)
+    bs2, a2, b2 = _split(digest2)
+    if bs1 != bs2 and bs1 != bs2 * 2 and bs2 != bs1 * 2:
+        return 0
+    a1, b1, a2, b2 = _squeeze(a1), _squeeze(b1), _squeeze(a2), _squeeze(b2)
+    if bs1 == bs2 and a1 == a2:
+        return 100
+    if bs1 == bs2:
+        return max(_score_strings(a1, a2, bs1), _score_strings(b1, b2, bs1 * 2))
+    if bs1 == bs2 * 2:
+        return _score_strings(a1, b2, bs1)
+    return _score_strings(b1, a2, bs2)
+
+def _grams(digest):
+    """Returns (block size, 7-gram) keys for both chunks, each gram packed into an integer."""
+    block_size, chunk, double_chunk = _split(digest)
+    keys = set()
+    for size, text in ((block_size, _squeeze(chunk)), (block_size * 2, _squeeze(double_chunk))):
+        for i in range(len(text) - ROLLING_WINDOW + 1):
+            gram = 0
+            for c in text[i:i + ROLLING_WINDOW]:
+                gram = (gram << 6) | _B64_VALUE[c]
+            keys.add((size, gram))
+    return keys
+
+class SimilarityIndex:
+    """Persistent index of fuzzy digests for "find files similar to X" searches."""
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " id INTEGER PRIMARY KEY, digest TEXT NOT NULL, path TEXT NOT NULL UNIQUE, size INTEGER)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS grams ("
+                " block_size INTEGER NOT NULL, gram INTEGER NOT NULL, entry_id INTEGER NOT NULL,"
+                " PRIMARY KEY (block_size, gram, entry_id)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS grams_entry ON grams (entry_id)")
+
+    def _connect(self):
+        return sqlite_util.connect(self.db_path)
+
+    def add_many(self, entries):
+        """Indexes (path, digest, size) tuples in one transaction; a path already present is replaced."""
+        conn = self._connect()
+        added = 0
+        with conn:
+            for path, digest, size in entries:
+                if not digest:
+                    continue
+                row = conn.execute("SELECT id FROM entries WHERE path = ?", (path,)).fetchone()
+                if row:
+                    conn.execute("DELETE FROM grams WHERE entry_id = ?", (row[0],))
+                    conn.execute("DELETE FROM entries WHERE id = ?", (row[0],))
+                entry_id = conn.execute("INSERT INTO entries (digest, path, size) VALUES (?, ?, ?)",
+                                        (digest, path, size)).lastrowid
+                conn.executemany("INSERT OR IGNORE INTO grams (block_size, gram, entry_id) VALUES (?, ?, ?)",
+                                 ((block_size, gram, entry_id) for block_size, gram in _grams(digest)))
+                added += 1
+        return added
+
+    def add(self, path, digest, size=None):
+        return self.add_many([(path, digest, size)])
+
+    def search(self, digest, min_score=1, limit=20):
+        """Returns up to limit (score, path, digest) matches, best first."""
+        conn = self._connect()
+        candidates = set()
+        for block_size, gram in _grams(digest):
+            candidates.update(row[0] for row in conn.execute(
+                "SELECT entry_id FROM grams WHERE block_size = ? AND gram = ?", (block_size, gram)))
+        matches = []
+        for entry_id in candidates:
+            path, other = conn.execute("SELECT path, digest FROM entries WHERE id = ?", (entry_id,)).fetchone()
+            score = compare(digest, other)
+            if score >= min_score:
+                matches.append((score, path, other))
+        matches.sort(key=lambda m: (-m[0], m[1]))
+        return matches[:limit]
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+def main():
+    from hashing import hash_file, iter_directory
+    parser = argparse.ArgumentParser(description="Build and search a fuzzy-hash similarity index.")
+    parser.add_argument('db', help="Similarity index database")
+    commands = parser.add_subparsers(dest='command', required=True)
+    index_cmd = commands.add_parser('index', help="Add the files under directories or files to the index")
+    index_cmd.add_argument('targets', nargs='+')
+    search_cmd = commands.add_parser('search', help="Find indexed files similar to a file or digest")
+    search_cmd.add_argument('target', help="A file path or an ssdeep digest")
+    search_cmd.add_argument('--min-score', type=int, default=1)
+    search_cmd.add_argument('--limit', type=int, default=20)
+    args = parser.parse_args()
+
+    index = SimilarityIndex(args.db)
+    if args.command == 'index':
+        for target in args.targets:
+            if os.path.isdir(target):
+                items = iter_directory(target, algorithms=[ALGORITHM])
+            else:
+                hashes = hash_file(target, algorithms=[ALGORITHM])
+                items = [{"metadata": {"File Path": os.path.abspath(target), "File Size": os.path.getsize(target)},
+                          "hashes": hashes}] if hashes else []
+            count = index.add_many((item["metadata"]["File Path"], item["hashes"]["SSDEEP"],
+                                    item["metadata"]["File Size"]) for item in items)
+            print(f"Indexed {count} files from {target}.")
+    else:
+        digest = args.target
+        if os.path.exists(args.target):
+            digest = (hash_file(args.target, algorithms=[ALGORITHM]) or {}).get("SSDEEP")
+        if not digest:
+            parser.error(f"Could not compute a fuzzy digest for {args.target}")
+        for score, path, _ in index.search(digest, args.min_score, args.limit):
+            print(f"{score:3d}  {path}")
+
+if __name__ == '__main__':
+    main()
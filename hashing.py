@@ -1,7 +1,40 @@
 # forensic_tool_web/hashing.py
 
+import collections
+import errno
+import functools
 import hashlib
+import io
+import itertools
+import mmap
 import os
+import stat
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import metrics
+from walker import walk_files
+
+# Size of the reusable read buffers used by hash_file. hashlib releases the
+# GIL for updates larger than 2 KiB, so blocks this size hash truly in parallel.
+BUFFER_SIZE = 4 * 1024 * 1024
+
+# Below this many bytes per update the thread hand-off costs more than it saves.
+PARALLEL_MIN_BLOCK = 256 * 1024
+
+# Regular files at least this large are memory-mapped instead of read.
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+# Regular files at least this large whose allocated blocks fall short of their size
+# are hashed extent by extent, so holes are never read (see _hash_sparse).
+SPARSE_MIN_SIZE = 1024 * 1024
+
+# On a single core the hashers cannot overlap, so updates stay on the caller's thread.
+PARALLEL_ENABLED = (os.cpu_count() or 1) > 1
+
+_executor = None
+_executor_lock = threading.Lock()
 
 def get_supported_algorithms():
     """Returns a list of supported hashing algorithms."""
@@ -10,54 +43,602 @@ def get_supported_algorithms():
         'blake2b', 'sha3_224', 'sha3_256', 'sha3_384', 'sha3_512'
     ]
 
-def hash_text(text):
+# Algorithms that can be selected but are not part of 'full': ssdeep (see fuzzy.py)
+# is a similarity digest, not a cryptographic one, and much slower.
+OPTIONAL_ALGORITHMS = ['ssdeep']
+
+# Named algorithm sets; only the hashers in the chosen profile are instantiated.
+ALGORITHM_PROFILES = {
+    'triage': ['sha256'],
+    'fast': ['blake2b'],
+    'court': ['md5', 'sha1', 'sha256'],
+    'full': get_supported_algorithms(),
+    # Without the ssdeep package the pure-Python fallback costs roughly 0.9 s per MiB and holds the
+    # GIL while it runs, so the web app only offers this profile when the package is installed.
+    'similarity': ['sha256', 'ssdeep'],
+}
+
+def resolve_algorithms(selection=None):
+    """Turns a profile name, a comma-separated list or a list into algorithm names.
+
+    None or an empty selection means the 'full' profile. Raises ValueError for
+    unknown profiles or algorithms.
+    """
+    if not selection:
+        return list(ALGORITHM_PROFILES['full'])
+    if isinstance(selection, str):
+        if selection.lower() in ALGORITHM_PROFILES:
+            return list(ALGORITHM_PROFILES[selection.lower()])
+        selection = selection.split(',')
+    algorithms = []
+    for alg in selection:
+        alg = alg.strip().lower()
+        if alg not in get_supported_algorithms() and alg not in OPTIONAL_ALGORITHMS:
+            raise ValueError(f"Unknown algorithm or profile: {alg}")
+        if alg not in algorithms:
+            algorithms.append(alg)
+    if not algorithms:
+        raise ValueError("No algorithms selected.")
+    return algorithms
+
+def _reset_executor():
+    # A forked child gets a copy of the pool but none of its threads, and maybe a held lock.
+    global _executor, _executor_lock
+    _executor = None
+    _executor_lock = threading.Lock()
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_executor)
+
+def _get_executor():
+    """Returns the shared thread pool used to run hasher updates in parallel."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            workers = max(len(get_supported_algorithms()), os.cpu_count() or 1)
+            _executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='hasher')
+        return _executor
+
+def _new_hasher(alg):
+    """Returns a new hashlib-style object for a supported or optional algorithm."""
+    if alg == 'ssdeep':
+        from fuzzy import FuzzyHasher
+        return FuzzyHasher()
+    return hashlib.new(alg)
+
+class MultiHasher:
+    """Feeds the same data to several hashers, one thread per hasher for large blocks.
+
+    Time spent in each algorithm is recorded in metrics.py once the digests are read.
+    """
+
+    def __init__(self, algorithms=None):
+        if algorithms is None:
+            algorithms = get_supported_algorithms()
+        self.hashers = {alg: _new_hasher(alg) for alg in algorithms}
+        self._pending = []
+        self._bytes = 0
+        self._seconds = dict.fromkeys(self.hashers, 0.0)
+        self._recorded = False
+
+    def _update_one(self, alg, data):
+        start = time.perf_counter()
+        self.hashers[alg].update(data)
+        self._seconds[alg] += time.perf_counter() - start
+
+    def update(self, data):
+        """Hashes data with every algorithm and waits for all of them to finish."""
+        self.update_async(data)
+        self.wait()
+
+    def update_async(self, data):
+        """Starts hashing data; the caller must not modify it until wait() returns."""
+        self.wait()
+        self._bytes += len(data)
+        if not PARALLEL_ENABLED or len(data) < PARALLEL_MIN_BLOCK:
+            for alg in self.hashers:
+                self._update_one(alg, data)
+            return
+        executor = _get_executor()
+        self._pending = [executor.submit(self._update_one, alg, data) for alg in self.hashers]
+
+    def wait(self):
+        """Blocks until the previous update_async() has been consumed by all hashers."""
+        pending, self._pending = self._pending, []
+        for future in pending:
+            future.result()
+
+    def hexdigests(self):
+        """Returns the digests keyed by upper-case algorithm name."""
+        self.wait()
+        if not self._recorded:
+            self._recorded = True
+            for alg, seconds in self._seconds.items():
+                metrics.record_hashing(alg, self._bytes, seconds)
+        return {alg.upper(): hasher.hexdigest() for alg, hasher in self.hashers.items()}
+
+def hash_text(text, algorithms=None):
     """Computes hashes for a given text string."""
-    hashes = {}
-    for algorithm in get_supported_algorithms():
-        h = hashlib.new(algorithm)
-        h.update(text.encode('utf-8'))
-        hashes[algorithm.upper()] = h.hexdigest()
-    return hashes
-
-def hash_file(file_path, chunk_size=8192):
-    """Computes hashes for a single file with efficient chunk processing."""
+    return _hash_text_batch([text], resolve_algorithms(algorithms))[0]
+
+# Strings per task handed to a bulk text worker.
+TEXT_BATCH_SIZE = 2000
+
+def _hash_text_batch(texts, algorithms):
+    """Hashes a list of strings, copying one pre-built hasher per algorithm for each string."""
+    templates = [(alg.upper(), _new_hasher(alg)) for alg in algorithms]
+    results = []
+    for text in texts:
+        data = text.encode('utf-8')
+        hashes = {}
+        for name, template in templates:
+            h = template.copy()
+            h.update(data)
+            hashes[name] = h.hexdigest()
+        results.append(hashes)
+    return results
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+def _hash_text_batches(pool, batches, algorithms, in_flight):
+    pending = collections.deque()
+    for batch in batches:
+        pending.append((batch, pool.submit(_hash_text_batch, batch, algorithms)))
+        if len(pending) >= in_flight:
+            batch, future = pending.popleft()
+            yield from zip(batch, future.result())
+    while pending:
+        batch, future = pending.popleft()
+        yield from zip(batch, future.result())
+
+def hash_texts(texts, algorithms=None, workers=1, batch_size=TEXT_BATCH_SIZE, pool=None):
+    """Yields (text, hashes) for every string of an iterable, in input order.
+
+    Strings are hashed in batches; with workers other than 1 the batches run
+    on a process pool (None means one process per CPU), with only a few
+    batches in flight so any number of strings can be streamed through.
+    pool may be a long-lived ProcessPoolExecutor to use instead of starting
+    one. Input that fits in a single batch is always hashed in the calling
+    process.
+    """
+    algorithms = resolve_algorithms(algorithms)
+    batches = _batches(texts, batch_size)
+    if workers == 1 and pool is None:
+        for batch in batches:
+            yield from zip(batch, _hash_text_batch(batch, algorithms))
+        return
+
+    first = next(batches, None)
+    second = next(batches, None)
+    if second is None:
+        if first is not None:
+            yield from zip(first, _hash_text_batch(first, algorithms))
+        return
+    batches = itertools.chain([first, second], batches)
+    in_flight = 2 * (workers or os.cpu_count() or 1)
+    if pool is not None:
+        yield from _hash_text_batches(pool, batches, algorithms, in_flight)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as own_pool:
+        yield from _hash_text_batches(own_pool, batches, algorithms, in_flight)
+
+def hash_stream(stream, chunk_size=BUFFER_SIZE, progress=None, algorithms=None):
+    """Hashes a binary stream, reading the next block while the previous one is hashed.
+
+    progress, if given, is called as progress(bytes, files) as work completes.
+    """
+    hasher = MultiHasher(resolve_algorithms(algorithms))
+    # Two alternating buffers: one is being hashed while the other is filled.
+    buffers = [bytearray(chunk_size), bytearray(chunk_size)]
+    views = [memoryview(buf) for buf in buffers]
+    current = 0
+    while True:
+        n = stream.readinto(buffers[current])
+        if not n:
+            break
+        hasher.update_async(views[current][:n])
+        current ^= 1
+        if progress:
+            progress(n, 0)
+    return hasher.hexdigests()
+
+class StreamingHasher(io.RawIOBase):
+    """Writable sink that hashes data as it is written, e.g. an upload being received.
+
+    Writes are gathered into large double buffers so the hashers still run in
+    parallel. If retain_path is given, a copy of the data is also written there.
+    """
+
+    def __init__(self, retain_path=None, chunk_size=BUFFER_SIZE, algorithms=None):
+        super().__init__()
+        self.hasher = MultiHasher(resolve_algorithms(algorithms))
+        self.size = 0
+        self.retain_path = retain_path
+        self._retained = open(retain_path, 'wb') if retain_path else None
+        self._buffers = [bytearray(chunk_size), bytearray(chunk_size)]
+        self._current = 0
+        self._fill = 0
+        self._digests = None
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        view = memoryview(data).cast('B')
+        if self._retained:
+            self._retained.write(view)
+        written = len(view)
+        while view:
+            buf = self._buffers[self._current]
+            n = min(len(buf) - self._fill, len(view))
+            buf[self._fill:self._fill + n] = view[:n]
+            self._fill += n
+            view = view[n:]
+            if self._fill == len(buf):
+                self._flush()
+        self.size += written
+        return written
+
+    def _flush(self):
+        if self._fill:
+            self.hasher.update_async(memoryview(self._buffers[self._current])[:self._fill])
+            self._current ^= 1
+            self._fill = 0
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        # Werkzeug rewinds finished uploads; there is nothing to re-read here.
+        return 0
+
+    def hexdigests(self):
+        """Finishes hashing and returns the digests keyed by upper-case algorithm name."""
+        if self._digests is None:
+            self._flush()
+            self._digests = self.hasher.hexdigests()
+            if self._retained:
+                self._retained.close()
+                self._retained = None
+        return self._digests
+
+    def close(self):
+        if self._retained:
+            self._retained.close()
+            self._retained = None
+        super().close()
+
+def _advise_sequential(fd):
+    """Tells the kernel the file will be read once, front to back."""
+    if hasattr(os, 'posix_fadvise'):
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        except OSError:
+            pass
+
+# Shared zeros fed to the hashers in place of holes; bytes are immutable, so any number of hashes can use it.
+_ZERO_BLOCK = memoryview(bytes(BUFFER_SIZE))
+
+def _is_sparse(st):
+    """True for regular files with fewer allocated bytes than their size, e.g. sparse disk images."""
+    return (stat.S_ISREG(st.st_mode) and st.st_size >= SPARSE_MIN_SIZE
+            and getattr(st, 'st_blocks', None) is not None and st.st_blocks * 512 < st.st_size)
+
+def _extents(fd, size):
+    """Yields (offset, length, is_data) covering the first size bytes, found with SEEK_DATA/SEEK_HOLE.
+
+    Where the platform or file system cannot report holes, the whole file is one data extent.
+    """
+    if not hasattr(os, 'SEEK_DATA'):
+        yield 0, size, True
+        return
+    offset = 0
+    while offset < size:
+        try:
+            data = os.lseek(fd, offset, os.SEEK_DATA)
+        except OSError as e:
+            # ENXIO: nothing but a hole up to the end of the file.
+            yield offset, size - offset, e.errno != errno.ENXIO
+            return
+        if data >= size:
+            yield offset, size - offset, False
+            return
+        if data > offset:
+            yield offset, data - offset, False
+        hole = min(os.lseek(fd, data, os.SEEK_HOLE), size)
+        yield data, hole - data, True
+        offset = hole
+
+def _hash_sparse(f, st, chunk_size, progress, algorithms):
+    """Hashes a file extent by extent, feeding holes from _ZERO_BLOCK instead of reading them.
+
+    The hashers see exactly the bytes a plain read would return, so the
+    digests are identical. Returns (hashes, bytes read from storage).
+    """
+    fd = f.fileno()
+    hasher = MultiHasher(algorithms)
+    zeros = _ZERO_BLOCK if chunk_size <= len(_ZERO_BLOCK) else memoryview(bytes(chunk_size))
+    buffers = [bytearray(chunk_size), bytearray(chunk_size)]
+    views = [memoryview(buf) for buf in buffers]
+    current = 0
+    bytes_read = 0
+    for offset, length, is_data in _extents(fd, st.st_size):
+        if not is_data:
+            while length:
+                n = min(length, chunk_size)
+                hasher.update_async(zeros[:n])
+                length -= n
+                if progress:
+                    progress(n, 0)
+            continue
+        f.seek(offset)
+        while length:
+            n = f.readinto(views[current][:min(length, chunk_size)])
+            if not n:
+                break
+            hasher.update_async(views[current][:n])
+            current ^= 1
+            length -= n
+            bytes_read += n
+            if progress:
+                progress(n, 0)
+    return hasher.hexdigests(), bytes_read
+
+def _hash_open_file(f, st, chunk_size, progress, algorithms):
+    """Picks the I/O strategy for an open file: extents for sparse files, mmap for large ones, readinto otherwise."""
+    fd = f.fileno()
+    _advise_sequential(fd)
+    if _is_sparse(st):
+        return _hash_sparse(f, st, chunk_size, progress, algorithms)[0]
+    if not stat.S_ISREG(st.st_mode):
+        # Devices and pipes report a size of 0, which says nothing about how much they hold.
+        return hash_stream(f, chunk_size, progress, algorithms)
+    if st.st_size < MMAP_THRESHOLD:
+        # Small files do not need full-size buffers.
+        return hash_stream(f, max(min(chunk_size, st.st_size), 1), progress, algorithms)
+
+    hasher = MultiHasher(algorithms)
+    with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+        if hasattr(mapped, 'madvise'):
+            mapped.madvise(mmap.MADV_SEQUENTIAL)
+        with memoryview(mapped) as view:
+            for offset in range(0, len(mapped), chunk_size):
+                # Slices share the mapping's pages; nothing is copied. Each block is
+                # finished before its view is released so the map can be closed.
+                with view[offset:offset + chunk_size] as block:
+                    hasher.update(block)
+                    if progress:
+                        progress(len(block), 0)
+    return hasher.hexdigests()
+
+@metrics.timed('hash_file')
+def hash_file(file_path, chunk_size=BUFFER_SIZE, progress=None, cache=None, algorithms=None):
+    """Computes hashes for a single file, running all algorithms over each block in parallel.
+
+    With a cache.HashCache in trust mode, files whose identity is unchanged
+    are not read again; otherwise the fresh digests are stored in the cache.
+    """
+    algorithms = resolve_algorithms(algorithms)
     try:
-        hashers = {alg: hashlib.new(alg) for alg in get_supported_algorithms()}
-        with open(file_path, 'rb') as f:
-            while chunk := f.read(chunk_size):
-                for hasher in hashers.values():
-                    hasher.update(chunk)
-        return {alg.upper(): hasher.hexdigest() for alg, hasher in hashers.items()}
+        with open(file_path, 'rb', buffering=0) as f:
+            st = os.fstat(f.fileno())
+            key = None
+            if cache is not None:
+                key = cache.identity(f, st)
+                if cache.trusted:
+                    hashes = cache.get(key, algorithms)
+                    if hashes:
+                        if progress:
+                            progress(st.st_size, 0)
+                        return hashes
+            hashes = _hash_open_file(f, st, chunk_size, progress, algorithms)
+            if cache is not None:
+                cache.put(key, file_path, hashes)
+            return hashes
     except Exception as e:
         print(f"Error hashing file {file_path}: {e}")
         return None
 
-def hash_directory(directory_path, excluded_extensions=None):
-    """Recursively hashes all files in a directory."""
-    from utils import get_file_metadata
+def _hash_device(f, st, chunk_size, progress, algorithms):
+    """hash_image() for block devices and pipes, whose st_size is 0: streams everything there is."""
+    size = None
+    if stat.S_ISBLK(st.st_mode):
+        size = os.lseek(f.fileno(), 0, os.SEEK_END)
+        os.lseek(f.fileno(), 0, os.SEEK_SET)
+    read = [0]
+
+    def count(nbytes, files):
+        read[0] += nbytes
+        if progress:
+            progress(nbytes, files)
+
+    hashes = _hash_open_file(f, st, chunk_size, count, algorithms)
+    if size is None:
+        size = read[0]
+    return hashes, {"Logical Size": size, "Allocated Size": size, "Bytes Read": read[0]}
+
+def hash_image(file_path, chunk_size=BUFFER_SIZE, progress=None, cache=None, algorithms=None):
+    """Hashes a disk image like hash_file(), always skipping reads of holes.
+
+    Returns (hashes, info), where info has the "Logical Size", the
+    "Allocated Size" on disk and the "Bytes Read" from storage, or None if
+    the image cannot be hashed. Block devices and pipes are read in full;
+    they have no holes to skip.
+    """
+    algorithms = resolve_algorithms(algorithms)
+    try:
+        with open(file_path, 'rb', buffering=0) as f:
+            st = os.fstat(f.fileno())
+            if not stat.S_ISREG(st.st_mode):
+                return _hash_device(f, st, chunk_size, progress, algorithms)
+            allocated = st.st_blocks * 512 if hasattr(st, 'st_blocks') else st.st_size
+            info = {"Logical Size": st.st_size, "Allocated Size": allocated, "Bytes Read": 0}
+            key = None
+            if cache is not None:
+                key = cache.identity(f, st)
+                if cache.trusted:
+                    hashes = cache.get(key, algorithms)
+                    if hashes:
+                        if progress:
+                            progress(st.st_size, 0)
+                        return hashes, info
+            _advise_sequential(f.fileno())
+            hashes, info["Bytes Read"] = _hash_sparse(f, st, chunk_size, progress, algorithms)
+            if cache is not None:
+                cache.put(key, file_path, hashes)
+            return hashes, info
+    except Exception as e:
+        print(f"Error hashing image {file_path}: {e}")
+        return None
+
+def _tag_known(metadata, hashes, known_db):
+    """Adds the known-hash classification to a result's metadata."""
+    if known_db is not None and hashes:
+        metadata["Known Status"] = known_db.classify(hashes)
+
+# Files smaller than this are grouped into batches for the process pool.
+SMALL_FILE_LIMIT = 1024 * 1024
+# Upper bounds for a single batch of small files.
+BATCH_MAX_FILES = 64
+BATCH_MAX_BYTES = 16 * 1024 * 1024
+
+def _collect_files(directory_path, excluded_extensions, rules=None):
+    """Walks the tree with walk_files() and returns (index, path, size, mtime) in its order."""
+    return [(index, entry.path, entry.size, entry.mtime)
+            for index, entry in enumerate(walk_files(directory_path, excluded_extensions, rules, prefetch=False))]
+
+def _schedule(entries):
+    """Splits files into tasks: large files alone and first, small files in batches."""
+    ordered = sorted(entries, key=lambda e: e[2], reverse=True)
+    tasks = []
+    batch, batch_bytes = [], 0
+    for entry in ordered:
+        if entry[2] >= SMALL_FILE_LIMIT:
+            tasks.append([entry])
+            continue
+        batch.append(entry)
+        batch_bytes += entry[2]
+        if len(batch) >= BATCH_MAX_FILES or batch_bytes >= BATCH_MAX_BYTES:
+            tasks.append(batch)
+            batch, batch_bytes = [], 0
+    if batch:
+        tasks.append(batch)
+    return tasks
+
+def _hash_batch(batch, cache=None, algorithms=None):
+    """Process-pool worker: hashes a batch of files and returns (index, item) pairs."""
+    from utils import file_metadata
+    done = []
+    for index, file_path, size, mtime in batch:
+        hashes = hash_file(file_path, cache=cache, algorithms=algorithms)
+        if hashes:
+            done.append((index, {"metadata": file_metadata(file_path, size, mtime), "hashes": hashes}))
+    return done
+
+def add_to_summary(summary, item):
+    """Counts one result item into a directory summary dict, creating the totals if needed."""
+    summary["Total Files Processed"] = summary.get("Total Files Processed", 0) + 1
+    summary["Total Directory Size"] = summary.get("Total Directory Size", 0) + item["metadata"]["File Size"]
+    if "CRC Check" in item["metadata"]:
+        mismatch = item["metadata"]["CRC Check"] == "MISMATCH"
+        summary["CRC Mismatches"] = summary.get("CRC Mismatches", 0) + int(mismatch)
+    if item["metadata"].get("Nested Archive", "").startswith("Incomplete"):
+        summary["Incomplete Archives"] = summary.get("Incomplete Archives", 0) + 1
+    if "Unique Contents" in summary:
+        # Deduplicated runs (see dedup.py) report identical copies under their first file.
+        duplicates = item.get("duplicates", ())
+        summary["Unique Contents"] += 1
+        summary["Total Files Processed"] += len(duplicates)
+        summary["Total Directory Size"] += sum(d["File Size"] for d in duplicates)
+        if duplicates:
+            summary["Duplicate Groups"] += 1
+            summary["Duplicate Files"] += len(duplicates)
+    return summary
+
+def _iter_parallel(directory_path, excluded_extensions, workers, progress, cache, algorithms, rules=None):
+    """Yields (walk index, item) pairs from the process pool in scheduling order."""
+    entries = _collect_files(directory_path, excluded_extensions, rules)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        # Tasks are submitted largest first so the longest files start early.
+        tasks = _schedule(entries)
+        for task, done in zip(tasks, pool.map(functools.partial(_hash_batch, cache=cache, algorithms=algorithms), tasks)):
+            if progress:
+                progress(sum(entry[2] for entry in task), len(task))
+            yield from done
+
+def hash_directory_parallel(directory_path, excluded_extensions=None, workers=None, progress=None, cache=None,
+                            known_db=None, algorithms=None, rules=None):
+    """Hashes a directory on a process pool; results match hash_directory()."""
+    if excluded_extensions is None:
+        excluded_extensions = []
+
+    indexed = list(_iter_parallel(directory_path, excluded_extensions, workers, progress, cache, algorithms, rules))
+    indexed.sort(key=lambda pair: pair[0])
+
+    results = []
+    summary = {"Total Files Processed": 0, "Total Directory Size": 0}
+    for _, item in indexed:
+        _tag_known(item["metadata"], item["hashes"], known_db)
+        results.append(item)
+        add_to_summary(summary, item)
+    return results, summary
+
+def iter_directory(directory_path, excluded_extensions=None, workers=1, progress=None, cache=None, known_db=None,
+                   algorithms=None, rules=None):
+    """Yields a result item for each file in a directory tree as soon as it has been hashed.
+
+    Serial runs yield in walk_files() order and hold only the current file in
+    memory. With a process pool, items arrive in scheduling order (largest
+    files first), which is deterministic for a given tree. rules is an
+    optional walker.WalkRules applied before files are opened.
+    """
+    from utils import file_metadata
     if excluded_extensions is None:
         excluded_extensions = []
-    
+    algorithms = resolve_algorithms(algorithms)
+
+    if workers != 1:
+        for _, item in _iter_parallel(directory_path, excluded_extensions, workers, progress, cache, algorithms,
+                                      rules):
+            _tag_known(item["metadata"], item["hashes"], known_db)
+            yield item
+        return
+
+    # The walk runs ahead on its own thread while files are hashed here.
+    for entry in walk_files(directory_path, excluded_extensions, rules):
+        hashes = hash_file(entry.path, progress=progress, cache=cache, algorithms=algorithms)
+        if hashes:
+            metadata = file_metadata(entry.path, entry.size, entry.mtime)
+            _tag_known(metadata, hashes, known_db)
+            yield {"metadata": metadata, "hashes": hashes}
+        if progress:
+            progress(0, 1)
+
+def hash_directory(directory_path, excluded_extensions=None, workers=1, progress=None, cache=None, known_db=None,
+                   algorithms=None, rules=None):
+    """Recursively hashes all files in a directory.
+
+    With workers other than 1 the files are spread across a process pool
+    (None means one process per CPU); results are still in walk_files() order.
+    cache is passed through to hash_file(); with a knownhash.KnownHashDB each
+    file is tagged with its known status. algorithms is a profile name or
+    list, see resolve_algorithms(). rules (a walker.WalkRules) filters files
+    by name, size and mtime before they are read. Use iter_directory() to
+    stream results.
+    """
+    if workers != 1:
+        return hash_directory_parallel(directory_path, excluded_extensions, workers, progress, cache, known_db,
+                                       algorithms, rules)
+
     results = []
-    total_files = 0
-    total_size = 0
-    
-    for root, _, files in os.walk(directory_path):
-        for file in files:
-            file_path = os.path.join(root, file)
-            if os.path.splitext(file_path)[1] in excluded_extensions:
-                continue
-
-            metadata = get_file_metadata(file_path)
-            if metadata:
-                hashes = hash_file(file_path)
-                if hashes:
-                    results.append({"metadata": metadata, "hashes": hashes})
-                    total_files += 1
-                    total_size += metadata["File Size"]
-
-    summary = {
-        "Total Files Processed": total_files,
-        "Total Directory Size": total_size
-    }
+    summary = {"Total Files Processed": 0, "Total Directory Size": 0}
+    for item in iter_directory(directory_path, excluded_extensions, 1, progress, cache, known_db, algorithms,
+                               rules):
+        results.append(item)
+        add_to_summary(summary, item)
     return results, summary
@@ -0,0 +1,156 @@
+# forensic_tool_web/jobs.py
+
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+
+class Job:
+    """A queued hashing run and its progress counters."""
+
+    def __init__(self, description="", job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.description = description
+        self.state = "queued"
+        self.total_bytes = None
+        self.total_files = None
+        self.bytes_done = 0
+        self.files_done = 0
+        self.result = None
+        self.error = None
+        self.submitted_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self._lock = threading.Lock()
+
+    def set_totals(self, total_bytes=None, total_files=None):
+        """Records the expected amount of work so throughput can be turned into an ETA."""
+        with self._lock:
+            self.total_bytes = total_bytes
+            self.total_files = total_files
+
+    def add_totals(self, nbytes=0, files=0):
+        """Grows the expected totals, e.g. as nested archive members are discovered."""
+        with self._lock:
+            if self.total_bytes is not None:
+                self.total_bytes += nbytes
+            if self.total_files is not None:
+                self.total_files += files
+
+    def advance(self, nbytes=0, files=0):
+        """Progress callback handed to the hashing functions."""
+        with self._lock:
+            self.bytes_done += nbytes
+            self.files_done += files
+
+    def status(self):
+        """Returns a JSON-serialisable snapshot of the job's state and progress."""
+        with self._lock:
+            elapsed = None
+            throughput = None
+            eta = None
+            if self.started_at:
+                elapsed = (self.finished_at or time.time()) - self.started_at
+                if elapsed > 0:
+                    throughput = self.bytes_done / elapsed
+            if self.state == "running" and throughput and self.total_bytes is not None:
+                eta = max(self.total_bytes - self.bytes_done, 0) / throughput
+            return {
+                "id": self.id,
+                "description": self.description,
+                "state": self.state,
+                "bytes_done": self.bytes_done,
+                "total_bytes": self.total_bytes,
+                "files_done": self.files_done,
+                "total_files": self.total_files,
+                "elapsed_seconds": elapsed,
+                "bytes_per_second": throughput,
+                "eta_seconds": eta,
+                "error": self.error,
+            }
+
+class JobManager:
+    """Runs hashing jobs on a local worker pool so requests return immediately."""
+
+    def __init__(self, max_workers=4, retention_seconds=3600):
+        self.retention_seconds = retention_seconds
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="job")
+        self._jobs = {}
+        self._lock = threading.Lock()
+
+    def submit(self, func, *args, description="", job_id=None, **kwargs):
+        """Queues func(job, *args, **kwargs); its return value becomes job.result.
+
+        job_id lets a job resumed after a restart keep the id its status URL was given under.
+        """
+        job = Job(description, job_id)
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        metrics.JOBS_QUEUED.inc()
+        self._executor.submit(self._run, job, func, args, kwargs)
+        return job
+
+    def track(self, future, description="", result=None):
+        """Registers a job for work that already runs elsewhere, e.g. in a process pool.
+
+        No worker thread waits for it: the job finishes with the future, and
+        job.result is result(value), or the future's value itself.
+        """
+        job = Job(description)
+        job.state = "running"
+        job.started_at = time.time()
+        with self._lock:
+            self._prune()
+            self._jobs[job.id] = job
+        metrics.JOBS_ACTIVE.inc()
+        future.add_done_callback(lambda f: self._finish(job, f, result))
+        return job
+
+    def get(self, job_id):
+        """Returns the job with the given id, or None if it is unknown or expired."""
+        with self._lock:
+            self._prune()
+            return self._jobs.get(job_id)
+
+    def _run(self, job, func, args, kwargs):
+        job.state = "running"
+        job.started_at = time.time()
+        metrics.JOBS_QUEUED.dec()
+        metrics.JOBS_ACTIVE.inc()
+        try:
+            with metrics.stage(f"job:{func.__name__.lstrip('_')}"):
+                job.result = func(job, *args, **kwargs)
+            job.state = "completed"
+        except Exception as e:
+            job.error = str(e)
+            job.state = "failed"
+            logging.error(f"Job {job.id} ({job.description}) failed: {e}", exc_info=True)
+        finally:
+            job.finished_at = time.time()
+            metrics.JOBS_ACTIVE.dec()
+            metrics.JOBS_FINISHED.inc(state=job.state)
+
+    def _finish(self, job, future, result):
+        try:
+            value = future.result()
+            job.result = result(value) if result else value
+            job.state = "completed"
+        except Exception as e:
+            job.error = str(e)
+            job.state = "failed"
+            logging.error(f"Job {job.id} ({job.description}) failed: {e}")
+        finally:
+            job.finished_at = time.time()
+            metrics.JOBS_ACTIVE.dec()
+            metrics.JOBS_FINISHED.inc(state=job.state)
+
+    def _prune(self):
+        cutoff = time.time() - self.retention_seconds
+        expired = [job_id for job_id, job in self._jobs.items()
+                   if job.finished_at and job.finished_at < cutoff]
+        for job_id in expired:
+            del self._jobs[job_id]
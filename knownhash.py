@@ -0,0 +1,225 @@
+# forensic_tool_web/knownhash.py
+
+import argparse
+import csv
+import heapq
+import json
+import math
+import mmap
+import os
+import struct
+import tempfile
+
+KNOWN_GOOD = 'known-good'
+KNOWN_BAD = 'known-bad'
+UNKNOWN = 'unknown'
+
+# Digest sizes in bytes for the algorithms hash lists are published in.
+DIGEST_SIZES = {'md5': 16, 'sha1': 20, 'sha256': 32}
+
+# NSRL-style CSV column names for each algorithm.
+CSV_COLUMNS = {'md5': ('md5',), 'sha1': ('sha-1', 'sha1'), 'sha256': ('sha-256', 'sha256')}
+
+INDEX_MAGIC = b'FHXIDX01'
+BLOOM_MAGIC = b'FHXBLM01'
+_HEADER = struct.Struct('<8sQQ')  # magic, record size / bit count, record count / hash count
+
+BLOOM_FALSE_POSITIVE_RATE = 0.001
+# Digests sorted in memory per run during import; runs are merged from disk.
+IMPORT_RUN_SIZE = 2_000_000
+
+def _algorithm_for_hex(hex_digest):
+    for algorithm, size in DIGEST_SIZES.items():
+        if len(hex_digest) == size * 2:
+            return algorithm
+    return None
+
+def _parse_digests(source_path, algorithm):
+    """Yields raw digests from a plain hash list or an NSRL-style CSV."""
+    with open(source_path, 'r', encoding='utf-8', errors='replace', newline='') as f:
+        first = f.readline()
+        f.seek(0)
+        header = [field.strip().strip('"').lower() for field in first.split(',')]
+        column = next((header.index(name) for name in CSV_COLUMNS[algorithm] if name in header), None)
+        if column is not None:
+            reader = csv.reader(f)
+            next(reader)
+            values = (row[column] if len(row) > column else '' for row in reader)
+        else:
+            values = (line.replace(',', ' ').split()[0] if line.strip() else '' for line in f)
+        for value in values:
+            value = value.strip().strip('"').lower()
+            if _algorithm_for_hex(value) != algorithm:
+                continue
+            try:
+                yield bytes.fromhex(value)
+            except ValueError:
+                continue
+
+def _bloom_params(expected_items):
+    bits = max(int(-expected_items * math.log(BLOOM_FALSE_POSITIVE_RATE) / (math.log(2) ** 2)), 64)
+    hashes = max(int(round(bits / max(expected_items, 1) * math.log(2))), 1)
+    return bits, hashes
+
+def _bloom_positions(digest, bits, hashes):
+    # Digests are already uniformly distributed, so they seed double hashing directly.
+    h1 = int.from_bytes(digest[:8], 'little')
+    h2 = int.from_bytes(digest[8:16], 'little') | 1
+    return [(h1 + i * h2) % bits for i in range(hashes)]
+
+def import_hash_list(db_dir, name, label, source_path, algorithm='sha256'):
+    """Imports a hash list into db_dir as a sorted index plus a Bloom filter.
+
+    Digests are sorted in bounded runs on disk and merged, so lists with tens
+    of millions of entries never have to fit in memory at once.
+    """
+    if label not in (KNOWN_GOOD, KNOWN_BAD):
+        raise ValueError(f"Label must be '{KNOWN_GOOD}' or '{KNOWN_BAD}'")
+    if algorithm not in DIGEST_SIZES:
+        raise ValueError(f"Unsupported hash list algorithm: {algorithm}")
+    os.makedirs(db_dir, exist_ok=True)
+    record_size = DIGEST_SIZES[algorithm]
+
+    runs = []
+    total = 0
+    with tempfile.TemporaryDirectory(dir=db_dir) as scratch:
+        batch = []
+        for digest in _parse_digests(source_path, algorithm):
+            batch.append(digest)
+            total += 1
+            if len(batch) >= IMPORT_RUN_SIZE:
+                runs.append(_write_run(scratch, len(runs), batch))
+                batch = []
+        if batch:
+            runs.append(_write_run(scratch, len(runs), batch))
+
+        bits, hashes = _bloom_params(total)
+        bloom = bytearray((bits + 7) // 8)
+        index_path = os.path.join(db_dir, f"{name}.{algorithm}.idx")
+        count = 0
+        files = [open(path, 'rb') for path in runs]
+        try:
+            readers = [iter(lambda f=f: f.read(record_size), b'') for f in files]
+            with open(index_path + '.tmp', 'wb') as out:
+                out.write(_HEADER.pack(INDEX_MAGIC, record_size, 0))
+                previous = None
+                for digest in heapq.merge(*readers):
+                    if digest == previous:
+                        continue
+                    out.write(digest)
+                    for pos in _bloom_positions(digest, bits, hashes):
+                        bloom[pos >> 3] |= 1 << (pos & 7)
+                    previous = digest
+                    count += 1
+                out.seek(0)
+                out.write(_HEADER.pack(INDEX_MAGIC, record_size, count))
+        finally:
+            for f in files:
+                f.close()
+    os.replace(index_path + '.tmp', index_path)
+
+    with open(os.path.join(db_dir, f"{name}.{algorithm}.bloom"), 'wb') as out:
+        out.write(_HEADER.pack(BLOOM_MAGIC, bits, hashes))
+        out.write(bloom)
+
+    sets = _read_manifest(db_dir)
+    sets[name] = {'label': label, 'algorithm': algorithm, 'count': count}
+    with open(os.path.join(db_dir, 'sets.json'), 'w') as f:
+        json.dump(sets, f, indent=2)
+    return count
+
+def _write_run(scratch, number, batch):
+    batch.sort()
+    path = os.path.join(scratch, f"run{number}.bin")
+    with open(path, 'wb') as f:
+        f.write(b''.join(batch))
+    return path
+
+def _read_manifest(db_dir):
+    path = os.path.join(db_dir, 'sets.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+class _HashSet:
+    """One imported list: a memory-mapped sorted index guarded by a Bloom filter."""
+
+    def __init__(self, db_dir, name, label, algorithm):
+        self.label = label
+        self.algorithm = algorithm
+        with open(os.path.join(db_dir, f"{name}.{algorithm}.idx"), 'rb') as f:
+            magic, self.record_size, self.count = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != INDEX_MAGIC:
+                raise ValueError(f"Not a known-hash index: {name}")
+            self.index = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if self.count else b''
+        with open(os.path.join(db_dir, f"{name}.{algorithm}.bloom"), 'rb') as f:
+            magic, self.bits, self.hashes = _HEADER.unpack(f.read(_HEADER.size))
+            if magic != BLOOM_MAGIC:
+                raise ValueError(f"Not a known-hash Bloom filter: {name}")
+            self.bloom = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __contains__(self, digest):
+        bloom = self.bloom
+        offset = _HEADER.size
+        for pos in _bloom_positions(digest, self.bits, self.hashes):
+            if not bloom[offset + (pos >> 3)] & (1 << (pos & 7)):
+                return False
+        # Possible member: confirm with a binary search over the sorted records.
+        size = self.record_size
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = _HEADER.size + mid * size
+            record = self.index[start:start + size]
+            if record < digest:
+                lo = mid + 1
+            elif record > digest:
+                hi = mid
+            else:
+                return True
+        return False
+
+class KnownHashDB:
+    """Classifies digests against imported known-good and known-bad hash sets.
+
+    Nothing is loaded into Python containers at startup; the indexes are
+    memory-mapped on first use, also in process-pool workers.
+    """
+
+    def __init__(self, db_dir):
+        self.db_dir = db_dir
+        self._sets = None
+
+    def __getstate__(self):
+        return {'db_dir': self.db_dir, '_sets': None}
+
+    def _open(self):
+        if self._sets is None:
+            self._sets = [_HashSet(self.db_dir, name, info['label'], info['algorithm'])
+                          for name, info in _read_manifest(self.db_dir).items()]
+            # Known-bad sets are checked first so they win over known-good matches.
+            self._sets.sort(key=lambda s: s.label != KNOWN_BAD)
+        return self._sets
+
+    def classify(self, hashes):
+        """Returns KNOWN_BAD, KNOWN_GOOD or UNKNOWN for a digest dict from the hashing engine."""
+        for hash_set in self._open():
+            hex_digest = hashes.get(hash_set.algorithm.upper())
+            if hex_digest and bytes.fromhex(hex_digest) in hash_set:
+                return hash_set.label
+        return UNKNOWN
+
+def main():
+    parser = argparse.ArgumentParser(description="Import a hash list into a known-hash database.")
+    parser.add_argument('db_dir', help="Known-hash database directory")
+    parser.add_argument('name', help="Name for this hash set, e.g. nsrl")
+    parser.add_argument('label', choices=[KNOWN_GOOD, KNOWN_BAD])
+    parser.add_argument('source', help="Plain hash list or NSRL-style CSV")
+    parser.add_argument('--algorithm', choices=sorted(DIGEST_SIZES), default='sha256')
+    args = parser.parse_args()
+    count = import_hash_list(args.db_dir, args.name, args.label, args.source, args.algorithm)
+    print(f"Imported {count} unique {args.algorithm} digests into '{args.name}' ({args.label}).")
+
+if __name__ == '__main__':
+    main()
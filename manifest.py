@@ -0,0 +1,90 @@
+# forensic_tool_web/manifest.py
+
+import csv
+import io
+import json
+import os
+
+from dedup import expand_duplicates
+
+FORMATS = {
+    'jsonl': ('application/x-ndjson', 'jsonl'),
+    'csv': ('text/csv', 'csv'),
+    'hashdeep': ('text/plain', 'txt'),
+}
+
+# Algorithms hashdeep understands, in the column order hashdeep itself uses.
+HASHDEEP_ALGORITHMS = ['MD5', 'SHA1', 'SHA256']
+
+def _path(metadata, root):
+    path = metadata["File Path"]
+    if root and os.path.isabs(path):
+        path = os.path.relpath(path, root)
+    return path.replace(os.sep, '/')
+
+def _jsonl(items, algorithms, root):
+    for item in items:
+        metadata = item["metadata"]
+        record = {
+            "path": _path(metadata, root),
+            "name": metadata["File Name"],
+            "size": metadata["File Size"],
+            "modified": metadata["Last Modified Time"],
+        }
+        for key, field in (("Known Status", "known_status"), ("CRC32", "crc32"), ("CRC Check", "crc_check"),
+                           ("Nested Archive", "nested_archive"), ("Archive Check", "archive_check"),
+                           ("Allocated Size", "allocated_size")):
+            if key in metadata:
+                record[field] = metadata[key]
+        record["hashes"] = item["hashes"]
+        yield json.dumps(record) + '\n'
+
+def _csv(items, algorithms, root):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+
+    def flush():
+        text = buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+        return text
+
+    writer.writerow(['path', 'name', 'size', 'modified', 'known_status'] + algorithms)
+    yield flush()
+    for item in items:
+        metadata = item["metadata"]
+        writer.writerow([_path(metadata, root), metadata["File Name"], metadata["File Size"],
+                         metadata["Last Modified Time"], metadata.get("Known Status", "")]
+                        + [item["hashes"].get(alg, "") for alg in algorithms])
+        yield flush()
+
+def _hashdeep(items, algorithms, root):
+    columns = [alg for alg in HASHDEEP_ALGORITHMS if alg in algorithms]
+    yield '%%%% HASHDEEP-1.0\n'
+    yield f"%%%% size,{','.join(alg.lower() for alg in columns)},filename\n"
+    yield '## Invoked from: Forensic Hashing-X\n'
+    yield '##\n'
+    for item in items:
+        if not all(alg in item["hashes"] for alg in columns):
+            continue
+        digests = ','.join(item["hashes"][alg] for alg in columns)
+        yield f"{item['metadata']['File Size']},{digests},{_path(item['metadata'], root)}\n"
+
+_WRITERS = {'jsonl': _jsonl, 'csv': _csv, 'hashdeep': _hashdeep}
+
+def iter_manifest(items, fmt, algorithms, root=None):
+    """Yields a manifest of result items as text chunks, one file at a time.
+
+    items may be any iterable (a list, iter_directory(), a result store
+    cursor), so memory use does not depend on the number of files. algorithms
+    are the upper-case digest names to write. Absolute paths are made
+    relative to root when it is given. Duplicates folded into an item by
+    dedup.py are written as rows of their own.
+    """
+    if fmt not in _WRITERS:
+        raise ValueError(f"Unknown manifest format: {fmt}")
+    algorithms = [alg.upper() for alg in algorithms]
+    if fmt == 'hashdeep' and not any(alg in algorithms for alg in HASHDEEP_ALGORITHMS):
+        # Raise before the first chunk so callers can still report the error.
+        raise ValueError("hashdeep manifests need MD5, SHA1 or SHA256 digests.")
+    return _WRITERS[fmt](expand_duplicates(items), algorithms, root)
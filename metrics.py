@@ -0,0 +1,159 @@
+# forensic_tool_web/metrics.py
+
+"""In-process metrics in the Prometheus text exposition format.
+
+Counters, gauges and histograms are registered once at import time and are
+safe to update from any thread. Work done inside process-pool workers is
+not visible here; only the parent process is measured.
+"""
+
+import bisect
+import functools
+import threading
+import time
+from contextlib import contextmanager
+
+# Bucket upper bounds in seconds for stage latencies.
+LATENCY_BUCKETS = (0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1, 5, 10, 30, 60, 300)
+# Bucket upper bounds in bytes per second for hashing throughput.
+THROUGHPUT_BUCKETS = tuple(mb * 1024 * 1024 for mb in (1, 10, 50, 100, 250, 500, 1000, 2000, 4000))
+# Only calls that hashed at least this much are observed, so tiny inputs do not skew throughput.
+THROUGHPUT_MIN_BYTES = 64 * 1024
+
+_registry = []
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(labels.get(name, '') for name in self.labelnames)
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_sample(key, value))
+        return lines
+
+    def _render_sample(self, key, value):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"]
+
+class Counter(_Metric):
+    """A value that only goes up, e.g. bytes hashed."""
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+class Gauge(_Metric):
+    """A value that goes up and down, e.g. jobs currently running."""
+    kind = 'gauge'
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+class Histogram(_Metric):
+    """Counts observations into cumulative buckets, with their sum and count."""
+    kind = 'histogram'
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                # Per-bucket counts (the last one is +Inf), then sum.
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0]
+            state[0][index] += 1
+            state[1] += value
+
+    def _render_sample(self, key, value):
+        counts, total = value
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets + ('+Inf',), counts):
+            cumulative += count
+            labels = _format_labels(self.labelnames, key, [('le', bound)])
+            lines.append(f"{self.name}_bucket{labels} {cumulative}")
+        labels = _format_labels(self.labelnames, key)
+        lines.append(f"{self.name}_sum{labels} {total}")
+        lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+def render():
+    """Returns every registered metric in the Prometheus text format."""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return '\n'.join(lines) + '\n'
+
+STAGE_SECONDS = Histogram('forensic_stage_seconds', 'Time spent per processing stage.', ['stage'])
+STAGE_ERRORS = Counter('forensic_stage_errors_total', 'Stages that ended with an exception.', ['stage'])
+HASH_BYTES = Counter('forensic_hash_bytes_total', 'Bytes fed to each hash algorithm.', ['algorithm'])
+HASH_SECONDS = Counter('forensic_hash_seconds_total', 'Time spent inside each hash algorithm.', ['algorithm'])
+HASH_THROUGHPUT = Histogram('forensic_hash_throughput_bytes_per_second',
+                            'Throughput of each hash algorithm per hashed input.', ['algorithm'], THROUGHPUT_BUCKETS)
+JOBS_QUEUED = Gauge('forensic_jobs_queued', 'Background jobs waiting for a worker.')
+JOBS_ACTIVE = Gauge('forensic_jobs_active', 'Background jobs currently running.')
+JOBS_FINISHED = Counter('forensic_jobs_finished_total', 'Background jobs that have finished.', ['state'])
+
+@contextmanager
+def stage(name):
+    """Times the enclosed block as a processing stage."""
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=name)
+        raise
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, stage=name)
+
+def timed(name):
+    """Decorator form of stage()."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def record_hashing(algorithm, nbytes, seconds):
+    """Records one finished input for an algorithm: totals plus a throughput observation."""
+    HASH_BYTES.inc(nbytes, algorithm=algorithm)
+    HASH_SECONDS.inc(seconds, algorithm=algorithm)
+    if nbytes >= THROUGHPUT_MIN_BYTES and seconds > 0:
+        HASH_THROUGHPUT.observe(nbytes / seconds, algorithm=algorithm)
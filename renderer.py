@@ -0,0 +1,131 @@
+# forensic_tool_web/renderer.py
+
+"""Background PDF rendering.
+
+Reports are built in a separate renderer process that loads reportlab, the
+stylesheet and the logo once and keeps them for every later report, so the
+web server only hands over a result id and case details. Finished reports
+are cached on disk under a name derived from (result id, case metadata):
+asking for the same report again is served without rendering it again.
+Each result's reports sit in a directory named after the result id, which
+is removed once the result itself has expired.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ProcessPoolExecutor
+
+# Case fields that make up the cache key; the cover's date is when the report was first rendered.
+CASE_FIELDS = ('investigator_name', 'case_id', 'case_description')
+
+# ResultStore per database path, opened once in each renderer process.
+_stores = {}
+
+def _init_worker():
+    import reporting
+    reporting.warm_up()
+
+def _render(store_path, result_id, case_metadata, report_path):
+    """Renderer process body: builds one report from the result store."""
+    from reporting import PDFReport
+    from resultstore import ResultStore
+    store = _stores.get(store_path)
+    if store is None:
+        store = _stores[store_path] = ResultStore(store_path)
+    report_data = store.load_report_data(result_id)
+    if not report_data:
+        raise ValueError("The results for this report have expired.")
+    # Written under a temporary name, so a half-built file is never served from the cache.
+    tmp_path = f"{report_path}.{os.getpid()}.tmp"
+    try:
+        pdf = PDFReport(tmp_path)
+        pdf.generate_cover_page(case_metadata)
+        pdf.add_hashing_results(report_data)
+        pdf.save()
+        os.replace(tmp_path, report_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return report_path
+
+def report_filename(result_id, case_metadata):
+    """Returns the cache file name for a report of result_id with the given case details."""
+    key = json.dumps([result_id] + [case_metadata.get(field, '') for field in CASE_FIELDS])
+    digest = hashlib.sha256(key.encode('utf-8')).hexdigest()[:20]
+    safe_case_id = "".join(c for c in case_metadata.get('case_id', '') if c.isalnum() or c in ('_')).rstrip()
+    return f"Forensic_Report_{safe_case_id}_{digest}.pdf"
+
+def report_path(result_id, case_metadata):
+    """Returns the report's path relative to the reports folder: <result id>/<file name>."""
+    return f"{result_id}/{report_filename(result_id, case_metadata)}"
+
+class ReportRenderer:
+    """Renders PDF reports in warm background processes and caches the results."""
+
+    def __init__(self, store_path, reports_folder, workers=1, mp_context=None):
+        self.store_path = store_path
+        self.reports_folder = reports_folder
+        self.workers = workers
+        self.mp_context = mp_context
+        self._last_purge = 0
+        self._executor = None
+        self._pending = {}
+        # Reentrant: a render that is already done runs its callback while the lock is held.
+        self._lock = threading.RLock()
+
+    def _pool(self):
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker,
+                                                 mp_context=self.mp_context)
+        return self._executor
+
+    def cached(self, result_id, case_metadata):
+        """Returns the relative path of an already rendered report, or None."""
+        path = report_path(result_id, case_metadata)
+        return path if os.path.exists(os.path.join(self.reports_folder, path)) else None
+
+    def submit(self, result_id, case_metadata):
+        """Starts rendering a report, or joins a render of the same report already in progress.
+
+        Returns (path relative to the reports folder, future) without
+        waiting; the future is done once the report is on disk.
+        """
+        path = report_path(result_id, case_metadata)
+        full_path = os.path.join(self.reports_folder, path)
+        with self._lock:
+            future = self._pending.get(path)
+            if future is None and os.path.exists(full_path):
+                future = Future()
+                future.set_result(full_path)
+            elif future is None:
+                os.makedirs(os.path.dirname(full_path), exist_ok=True)
+                future = self._pool().submit(_render, self.store_path, result_id, case_metadata, full_path)
+                self._pending[path] = future
+                future.add_done_callback(lambda f: self._forget(path))
+        return path, future
+
+    def _forget(self, path):
+        with self._lock:
+            self._pending.pop(path, None)
+
+    def purge_expired(self, store, force=False):
+        """Deletes the reports of results that store no longer holds. Runs at most once a minute unless forced."""
+        now = time.time()
+        if not force and now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        if not os.path.isdir(self.reports_folder):
+            return
+        with self._lock:
+            for name in os.listdir(self.reports_folder):
+                directory = os.path.join(self.reports_folder, name)
+                if os.path.isdir(directory) and store.get(name) is None:
+                    shutil.rmtree(directory, ignore_errors=True)
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown()
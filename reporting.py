@@ -1,15 +1,208 @@
 # forensic_tool_web/reporting.py
 
+import functools
+import itertools
 import os
 from datetime import datetime
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Image, PageBreak, Table, TableStyle, Frame, PageTemplate
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, PageBreak, Table, TableStyle, Frame, PageTemplate, Flowable
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT, TA_JUSTIFY
 from reportlab.lib import colors  # <-- यह लाइन जोड़ दी गई है
 from reportlab.lib.units import inch
 from reportlab.pdfgen import canvas
 from reportlab.lib.pagesizes import letter
+from reportlab.lib.utils import ImageReader
 from utils import format_size
+from metrics import timed
+
+# Directory results with more files than this use the compact manifest layout.
+MANIFEST_THRESHOLD = 100
+# Files per manifest table; each table is only built when the page builder reaches it.
+MANIFEST_CHUNK_FILES = 40
+# Flowables kept ahead of the page builder, which caps memory in high-volume mode.
+STORY_WINDOW = 32
+
+# Characters per line that fit the manifest columns at the fonts used below.
+MANIFEST_FILE_CHARS = 42
+MANIFEST_DIGEST_CHARS = 92
+
+class _Deferred:
+    """Placeholder in the story for flowables that are generated during the build."""
+
+    def __init__(self, flowables):
+        self.flowables = flowables
+
+class _LazyStory(list):
+    """Story list that pulls flowables from a generator as the document builder consumes them.
+
+    The builder only ever looks at the front of the list, so at most about
+    `window` flowables exist at any time no matter how long the report is.
+    """
+
+    def __init__(self, source, window=STORY_WINDOW):
+        super().__init__()
+        self._source = source
+        self._window = window
+
+    def _fill(self):
+        while self._source is not None and list.__len__(self) < self._window:
+            try:
+                self.append(next(self._source))
+            except StopIteration:
+                self._source = None
+
+    def __len__(self):
+        self._fill()
+        return list.__len__(self)
+
+    def __getitem__(self, index):
+        self._fill()
+        return list.__getitem__(self, index)
+
+def _wrap(text, width):
+    """Hard-wraps text into lines of at most width characters."""
+    text = str(text)
+    return [text[i:i + width] for i in range(0, len(text), width)] or ['']
+
+# --- Professional Color Palette (Court-Ready Theme) ---
+COLORS = {
+    "header_blue": colors.HexColor('#0D47A1'),   # Deep blue for headers
+    "section_blue": colors.HexColor('#003366'),  # Dark blue for section headings
+    "dark_text": colors.HexColor('#333333'),     # Dark gray for body text
+    "accent_text": colors.HexColor('#004D40'),   # Dark teal for hash values
+    "gold_accent": colors.HexColor('#C9A43B'),   # Gold for accents
+    "white": colors.HexColor('#FFFFFF'),
+    "zebra_stripe": colors.HexColor('#F5F5F5'),  # Light gray for table rows
+    "light_gold": colors.HexColor('#F8F4E6'),    # Light gold for background accents
+}
+
+@functools.lru_cache(maxsize=None)
+def _shared_styles():
+    """Creates custom paragraph styles for a professional report."""
+    styles = getSampleStyleSheet()
+    
+    # Cover page styles
+    styles.add(ParagraphStyle(
+        name='CoverTitle', 
+        fontName='Helvetica-Bold', 
+        fontSize=26, 
+        textColor=COLORS['section_blue'], 
+        alignment=TA_CENTER, 
+        spaceAfter=12
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CoverSubtitle', 
+        fontName='Helvetica', 
+        fontSize=14, 
+        textColor=COLORS['dark_text'], 
+        alignment=TA_CENTER, 
+        spaceAfter=24
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='CoverSectionHeader', 
+        fontName='Helvetica-Bold', 
+        fontSize=16,
+        textColor=COLORS['dark_text'], 
+        alignment=TA_CENTER, 
+        spaceAfter=14
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='PoweredBy', 
+        fontName='Helvetica-Oblique', 
+        fontSize=10, 
+        textColor=COLORS['dark_text'], 
+        alignment=TA_CENTER
+    ))
+
+    # Document styles
+    styles.add(ParagraphStyle(
+        name='SectionHeader', 
+        fontName='Helvetica-Bold', 
+        fontSize=14, 
+        textColor=COLORS['section_blue'], 
+        alignment=TA_LEFT, 
+        spaceAfter=14, 
+        spaceBefore=12,
+        borderPadding=5,
+        borderColor=COLORS['gold_accent'],
+        borderWidth=1,
+        backColor=COLORS['light_gold']
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='SubsectionHeader', 
+        fontName='Helvetica-Bold', 
+        fontSize=12, 
+        textColor=COLORS['section_blue'], 
+        alignment=TA_LEFT, 
+        spaceAfter=8, 
+        spaceBefore=10
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='Body', 
+        fontName='Helvetica', 
+        fontSize=10, 
+        textColor=COLORS['dark_text'], 
+        alignment=TA_JUSTIFY, 
+        spaceAfter=6, 
+        leading=14
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='BodyBold', 
+        parent=styles['Body'], 
+        fontName='Helvetica-Bold',
+        textColor=colors.black
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='Mono', 
+        fontName='Courier-Bold', 
+        fontSize=9, 
+        textColor=COLORS['accent_text'], 
+        alignment=TA_LEFT
+    ))
+    
+    styles.add(ParagraphStyle(
+        name='Footer', 
+        fontName='Helvetica', 
+        fontSize=8, 
+        textColor=colors.grey, 
+        alignment=TA_CENTER
+    ))
+    return styles
+
+LOGO_PATH = os.path.join(os.path.dirname(__file__), 'static', 'images', 'logo.png')
+
+@functools.lru_cache(maxsize=None)
+def _logo_reader():
+    """Returns the logo as a decoded ImageReader shared by all reports, or None if it is missing."""
+    if not os.path.exists(LOGO_PATH):
+        return None
+    reader = ImageReader(LOGO_PATH)
+    reader.getRGBData()  # Decoded once here instead of on every cover page.
+    return reader
+
+class _Logo(Flowable):
+    """Draws the shared logo without re-reading or re-decoding the image file."""
+
+    def __init__(self, reader, size):
+        super().__init__()
+        self.reader = reader
+        self.width = self.height = size
+        self.hAlign = 'CENTER'
+
+    def draw(self):
+        self.canv.drawImage(self.reader, 0, 0, self.width, self.height, mask='auto')
+
+def warm_up():
+    """Builds the shared styles and logo ahead of the first report, e.g. in a renderer process."""
+    _shared_styles()
+    _logo_reader()
 
 class PDFReport:
     def __init__(self, filename, company_name="Cyber Hunter Warrior"):
@@ -25,117 +218,12 @@ class PDFReport:
         )
         self.story = []
         
-        # --- Professional Color Palette (Court-Ready Theme) ---
-        self.colors = {
-            "header_blue": colors.HexColor('#0D47A1'),   # Deep blue for headers
-            "section_blue": colors.HexColor('#003366'),  # Dark blue for section headings
-            "dark_text": colors.HexColor('#333333'),     # Dark gray for body text
-            "accent_text": colors.HexColor('#004D40'),   # Dark teal for hash values
-            "gold_accent": colors.HexColor('#C9A43B'),   # Gold for accents
-            "white": colors.HexColor('#FFFFFF'),
-            "zebra_stripe": colors.HexColor('#F5F5F5'),  # Light gray for table rows
-            "light_gold": colors.HexColor('#F8F4E6'),    # Light gold for background accents
-        }
-
+        self.colors = COLORS
         self._create_styles()
 
     def _create_styles(self):
-        """Creates custom paragraph styles for a professional report."""
-        self.styles = getSampleStyleSheet()
-        
-        # Cover page styles
-        self.styles.add(ParagraphStyle(
-            name='CoverTitle', 
-            fontName='Helvetica-Bold', 
-            fontSize=26, 
-            textColor=self.colors['section_blue'], 
-            alignment=TA_CENTER, 
-            spaceAfter=12
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CoverSubtitle', 
-            fontName='Helvetica', 
-            fontSize=14, 
-            textColor=self.colors['dark_text'], 
-            alignment=TA_CENTER, 
-            spaceAfter=24
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='CoverSectionHeader', 
-            fontName='Helvetica-Bold', 
-            fontSize=16,
-            textColor=self.colors['dark_text'], 
-            alignment=TA_CENTER, 
-            spaceAfter=14
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='PoweredBy', 
-            fontName='Helvetica-Oblique', 
-            fontSize=10, 
-            textColor=self.colors['dark_text'], 
-            alignment=TA_CENTER
-        ))
-
-        # Document styles
-        self.styles.add(ParagraphStyle(
-            name='SectionHeader', 
-            fontName='Helvetica-Bold', 
-            fontSize=14, 
-            textColor=self.colors['section_blue'], 
-            alignment=TA_LEFT, 
-            spaceAfter=14, 
-            spaceBefore=12,
-            borderPadding=5,
-            borderColor=self.colors['gold_accent'],
-            borderWidth=1,
-            backColor=self.colors['light_gold']
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='SubsectionHeader', 
-            fontName='Helvetica-Bold', 
-            fontSize=12, 
-            textColor=self.colors['section_blue'], 
-            alignment=TA_LEFT, 
-            spaceAfter=8, 
-            spaceBefore=10
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='Body', 
-            fontName='Helvetica', 
-            fontSize=10, 
-            textColor=self.colors['dark_text'], 
-            alignment=TA_JUSTIFY, 
-            spaceAfter=6, 
-            leading=14
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='BodyBold', 
-            parent=self.styles['Body'], 
-            fontName='Helvetica-Bold',
-            textColor=colors.black
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='Mono', 
-            fontName='Courier-Bold', 
-            fontSize=9, 
-            textColor=self.colors['accent_text'], 
-            alignment=TA_LEFT
-        ))
-        
-        self.styles.add(ParagraphStyle(
-            name='Footer', 
-            fontName='Helvetica', 
-            fontSize=8, 
-            textColor=colors.grey, 
-            alignment=TA_CENTER
-        ))
+        """Uses the shared stylesheet; it is built once per process."""
+        self.styles = _shared_styles()
 
     def _header_footer(self, canvas, doc):
         """Adds a professional header and footer with company name, rights reserved, and page number."""
@@ -155,10 +243,9 @@ class PDFReport:
         canvas.setFont('Helvetica', 9)
         canvas.setFillColor(colors.grey)
         
-        current_year = datetime.now().year
-        copyright_text = f"© {current_year} {self.company_name}. All Rights Reserved."
+        # Only the page number changes from page to page; the rest is fixed when the build starts.
+        copyright_text, timestamp = self._footer_text
         page_text = f"Page {doc.page}"
-        timestamp = f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
 
         canvas.drawString(doc.leftMargin, doc.bottomMargin - 0.3*inch, copyright_text)
         canvas.drawCentredString(doc.width/2 + doc.leftMargin, doc.bottomMargin - 0.3*inch, timestamp)
@@ -174,11 +261,9 @@ class PDFReport:
     def generate_cover_page(self, case_metadata):
         """Creates a clean, professional cover page with a styled table."""
         # Add company logo
-        logo_path = os.path.join(os.path.dirname(__file__), 'static', 'images', 'logo.png')
-        if os.path.exists(logo_path):
-            logo = Image(logo_path, width=1.8*inch, height=1.8*inch)
-            logo.hAlign = 'CENTER'
-            self.story.append(logo)
+        logo = _logo_reader()
+        if logo is not None:
+            self.story.append(_Logo(logo, 1.8*inch))
         else:
             # Fallback to text if logo not available
             self.story.append(Paragraph(self.company_name, self.styles['CoverTitle']))
@@ -226,8 +311,14 @@ class PDFReport:
         self.story.append(Spacer(1, 0.3 * inch))
         self.story.append(PageBreak())
 
-    def add_hashing_results(self, report_data):
-        """Adds all hashing results. LOGIC IS UNCHANGED."""
+    @timed('pdf_story')
+    def add_hashing_results(self, report_data, compact=None):
+        """Adds all hashing results.
+
+        Directory results with more than MANIFEST_THRESHOLD files (or with
+        compact=True) are rendered as a compact manifest that is generated
+        while the PDF is built, so large cases do not hold the whole story.
+        """
         # Add a brief introduction section
         intro_text = """
         This document presents the cryptographic hash values generated during the forensic examination. 
@@ -236,6 +327,8 @@ class PDFReport:
         """
         self.story.append(Paragraph("Report Overview", self.styles['SectionHeader']))
         self.story.append(Paragraph(intro_text, self.styles['Body']))
+        if report_data.get('algorithms'):
+            self.story.append(Paragraph(f"<b>Algorithms Computed:</b> {', '.join(report_data['algorithms'])}", self.styles['Body']))
         self.story.append(Spacer(1, 0.2*inch))
         
         # This part of the logic remains exactly the same as your original code.
@@ -253,11 +346,20 @@ class PDFReport:
 
         if report_data.get('dir_results'):
             self.story.append(Paragraph("Directory Hashing Results", self.styles['SectionHeader']))
-            self._add_metadata_table(report_data['dir_results']['summary'], is_summary=True)
+            summary = report_data['dir_results']['summary']
+            self._add_metadata_table(summary, is_summary=True)
             self.story.append(Spacer(1, 0.2*inch))
-            for i, item in enumerate(report_data['dir_results']['results']):
+            if compact is None:
+                compact = summary["Total Files Processed"] > MANIFEST_THRESHOLD
+            if compact:
+                self.story.append(_Deferred(self._manifest_flowables(report_data['dir_results']['results'])))
+                self.story.append(Spacer(1, 0.3*inch))
+            for i, item in enumerate([] if compact else report_data['dir_results']['results']):
                 self.story.append(Paragraph(f"File Details: {item['metadata']['File Name']}", self.styles['SubsectionHeader']))
                 self._add_metadata_table(item['metadata'])
+                if item.get('duplicates'):
+                    copies = '<br/>'.join(d['File Path'] for d in item['duplicates'])
+                    self.story.append(Paragraph(f"<b>Identical Copies ({len(item['duplicates'])}):</b><br/>{copies}", self.styles['Body']))
                 self._add_table(item['hashes'])
                 self.story.append(Spacer(1, 0.3*inch))
                 
@@ -301,6 +403,9 @@ class PDFReport:
                 [Paragraph("<b>Total Files Processed:</b>", self.styles['BodyBold']), Paragraph(str(metadata["Total Files Processed"]), self.styles['Body'])],
                 [Paragraph("<b>Total Directory Size:</b>", self.styles['BodyBold']), Paragraph(format_size(metadata["Total Directory Size"]), self.styles['Body'])]
             ]
+            for key in ("Unique Contents", "Duplicate Groups", "Duplicate Files", "Incomplete Archives", "Archive Error"):
+                if key in metadata:
+                    data.append([Paragraph(f"<b>{key}:</b>", self.styles['BodyBold']), Paragraph(str(metadata[key]), self.styles['Body'])])
         else:
              data = [
                 [Paragraph("<b>File Name:</b>", self.styles['BodyBold']), Paragraph(metadata["File Name"], self.styles['Body'])],
@@ -308,6 +413,11 @@ class PDFReport:
                 [Paragraph("<b>File Path:</b>", self.styles['BodyBold']), Paragraph(metadata["File Path"], self.styles['Body'])],
                 [Paragraph("<b>Last Modified:</b>", self.styles['BodyBold']), Paragraph(metadata["Last Modified Time"], self.styles['Body'])],
             ]
+             for key in ("Known Status", "Nested Archive", "Archive Check"):
+                if key in metadata:
+                    data.append([Paragraph(f"<b>{key}:</b>", self.styles['BodyBold']), Paragraph(metadata[key], self.styles['Body'])])
+             if "Allocated Size" in metadata:
+                data.append([Paragraph("<b>Allocated Size:</b>", self.styles['BodyBold']), f"{metadata['Allocated Size']} bytes ({format_size(metadata['Allocated Size'])})"])
         
         table = Table(data, colWidths=[1.5 * inch, 5 * inch])
         table.setStyle(TableStyle([
@@ -355,8 +465,91 @@ class PDFReport:
         table.setStyle(style)
         self.story.append(table)
         
+    def _manifest_style(self):
+        """Returns the shared table style for manifest chunks, creating it once."""
+        if getattr(self, '_manifest_table_style', None) is None:
+            self._manifest_table_style = TableStyle([
+                ('BACKGROUND', (0, 0), (-1, 0), self.colors['header_blue']),
+                ('TEXTCOLOR', (0, 0), (-1, 0), self.colors['white']),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 8),
+                ('FONTNAME', (0, 1), (1, -1), 'Helvetica'),
+                ('FONTSIZE', (0, 1), (1, -1), 7),
+                ('LEADING', (0, 1), (1, -1), 8.5),
+                ('FONTNAME', (2, 1), (2, -1), 'Courier'),
+                ('FONTSIZE', (2, 1), (2, -1), 5.5),
+                ('LEADING', (2, 1), (2, -1), 6.5),
+                ('TEXTCOLOR', (0, 1), (1, -1), self.colors['dark_text']),
+                ('TEXTCOLOR', (2, 1), (2, -1), self.colors['accent_text']),
+                ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+                ('TOPPADDING', (0, 0), (-1, -1), 3),
+                ('BOTTOMPADDING', (0, 0), (-1, -1), 3),
+                ('LEFTPADDING', (0, 0), (-1, -1), 4),
+                ('RIGHTPADDING', (0, 0), (-1, -1), 4),
+                ('ROWBACKGROUNDS', (0, 1), (-1, -1), [self.colors['white'], self.colors['zebra_stripe']]),
+                ('BOX', (0, 0), (-1, -1), 1, self.colors['gold_accent']),
+                ('LINEBELOW', (0, 0), (-1, -1), 0.25, self.colors['gold_accent']),
+            ])
+        return self._manifest_table_style
+
+    def _manifest_row(self, number, item):
+        """Builds one manifest row from plain strings; no Paragraph layout is needed."""
+        metadata = item['metadata']
+        file_lines = _wrap(metadata['File Name'], MANIFEST_FILE_CHARS)
+        file_lines.append(f"{format_size(metadata['File Size'])} | {metadata['Last Modified Time']}")
+        if metadata.get('Known Status'):
+            file_lines.append(f"Status: {metadata['Known Status']}")
+        if metadata.get('Archive Check'):
+            file_lines.append(metadata['Archive Check'])
+        file_lines.extend(_wrap(metadata['File Path'], MANIFEST_FILE_CHARS))
+        if item.get('duplicates'):
+            file_lines.append(f"Identical copies: {len(item['duplicates'])}")
+            for duplicate in item['duplicates']:
+                file_lines.extend(_wrap(duplicate['File Path'], MANIFEST_FILE_CHARS))
+
+        # Short digests share a line; long ones are wrapped across lines.
+        digest_lines = []
+        line = ''
+        for alg, h_val in item['hashes'].items():
+            entry = f"{alg} {h_val}"
+            if len(entry) > MANIFEST_DIGEST_CHARS:
+                if line:
+                    digest_lines.append(line)
+                    line = ''
+                digest_lines.extend(_wrap(entry, MANIFEST_DIGEST_CHARS))
+            elif line and len(line) + 2 + len(entry) > MANIFEST_DIGEST_CHARS:
+                digest_lines.append(line)
+                line = entry
+            else:
+                line = f"{line}  {entry}" if line else entry
+        if line:
+            digest_lines.append(line)
+        return [str(number), '\n'.join(file_lines), '\n'.join(digest_lines)]
+
+    def _manifest_flowables(self, results):
+        """Yields the manifest as a series of small tables, one chunk of files at a time."""
+        header = ['#', 'File', 'Digests']
+        style = self._manifest_style()
+        results = iter(results)
+        number = 1
+        while True:
+            chunk = list(itertools.islice(results, MANIFEST_CHUNK_FILES))
+            if not chunk:
+                break
+            rows = [header]
+            for item in chunk:
+                rows.append(self._manifest_row(number, item))
+                number += 1
+            table = Table(rows, colWidths=[0.45 * inch, 2.2 * inch, 4.35 * inch], repeatRows=1)
+            table.setStyle(style)
+            yield table
+
+    @timed('pdf_build')
     def save(self):
         """Saves the PDF. NO CHANGE IN LOGIC HERE."""
+        now = datetime.now()
+        self._footer_text = (f"© {now.year} {self.company_name}. All Rights Reserved.",
+                             f"Generated: {now.strftime('%Y-%m-%d %H:%M:%S')}")
         frame = Frame(self.doc.leftMargin, self.doc.bottomMargin, self.doc.width, self.doc.height, id='normal')
         
         content_template = PageTemplate(id='content', frames=[frame], onPage=self._header_footer)
@@ -370,4 +563,9 @@ class PDFReport:
         # This is corrected to apply the content template from the second page onwards
         self.story.append(Paragraph('<setnextpage template=content>'))
 
-        self.doc.build(self.story)
+        story = self.story
+        if any(isinstance(f, _Deferred) for f in story):
+            # High-volume mode: expand the deferred manifest lazily while pages are built.
+            flowables = (f.flowables if isinstance(f, _Deferred) else [f] for f in story)
+            story = _LazyStory(itertools.chain.from_iterable(flowables))
+        self.doc.build(story)
@@ -0,0 +1,153 @@
+# forensic_tool_web/resultstore.py
+
+import json
+import sqlite3
+import time
+import uuid
+
+import sqlite_util
+
+# Rows fetched per round trip when streaming entries back out.
+FETCH_SIZE = 500
+
+class ResultStore:
+    """Server-side store for hashing results, keyed by a result id.
+
+    Only the id needs to live in the user's session. Directory results are
+    appended entry by entry as they are produced and read back lazily, so
+    neither request size nor memory grows with the size of the case.
+    Results older than ttl_seconds are purged.
+    """
+
+    def __init__(self, db_path, ttl_seconds=24 * 3600):
+        self.db_path = db_path
+        self.ttl_seconds = ttl_seconds
+        self._last_purge = 0
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                " id TEXT PRIMARY KEY, created REAL NOT NULL, kind TEXT NOT NULL,"
+                " header TEXT NOT NULL, entry_count INTEGER NOT NULL DEFAULT 0,"
+                " complete INTEGER NOT NULL DEFAULT 0)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " result_id TEXT NOT NULL, seq INTEGER NOT NULL, data TEXT NOT NULL,"
+                " PRIMARY KEY (result_id, seq))"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_created ON results (created)")
+
+    def _connect(self):
+        return sqlite_util.connect(self.db_path)
+
+    def create(self, kind, header=None, complete=False):
+        """Starts a new result and returns its id."""
+        self.purge_expired()
+        result_id = uuid.uuid4().hex
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "INSERT INTO results (id, created, kind, header, complete) VALUES (?, ?, ?, ?, ?)",
+                (result_id, time.time(), kind, json.dumps(header or {}), int(complete))
+            )
+        return result_id
+
+    def save(self, kind, header):
+        """Stores a small, complete result (text or single file) in one step."""
+        return self.create(kind, header, complete=True)
+
+    def append(self, result_id, items):
+        """Appends directory entries to a result in a single transaction."""
+        items = list(items)
+        if not items:
+            return
+        conn = self._connect()
+        with conn:
+            start = conn.execute("SELECT entry_count FROM results WHERE id = ?", (result_id,)).fetchone()[0]
+            conn.executemany(
+                "INSERT INTO entries (result_id, seq, data) VALUES (?, ?, ?)",
+                ((result_id, start + i, json.dumps(item)) for i, item in enumerate(items))
+            )
+            conn.execute("UPDATE results SET entry_count = ? WHERE id = ?", (start + len(items), result_id))
+
+    def truncate(self, result_id, count):
+        """Drops a result's entries from position count on, e.g. the unfinished tail of an interrupted run."""
+        conn = self._connect()
+        with conn:
+            conn.execute("DELETE FROM entries WHERE result_id = ? AND seq >= ?", (result_id, count))
+            conn.execute("UPDATE results SET entry_count = MIN(entry_count, ?) WHERE id = ?", (count, result_id))
+
+    def finish(self, result_id, **header_fields):
+        """Merges final fields (e.g. the summary) into the header and marks the result complete."""
+        header = self.get(result_id)
+        header.update(header_fields)
+        conn = self._connect()
+        with conn:
+            conn.execute("UPDATE results SET header = ?, complete = 1 WHERE id = ?",
+                         (json.dumps(header), result_id))
+
+    def get(self, result_id):
+        """Returns the header of a stored result, or None if it is unknown or expired."""
+        row = self._connect().execute(
+            "SELECT header, kind, entry_count, created FROM results WHERE id = ?", (result_id,)
+        ).fetchone()
+        if row is None or row[3] < time.time() - self.ttl_seconds:
+            return None
+        header = json.loads(row[0])
+        header.setdefault('type', row[1])
+        header['entry_count'] = row[2]
+        return header
+
+    def iter_entries(self, result_id, limit=None):
+        """Yields stored directory entries in order without loading them all at once."""
+        # A dedicated connection, so a slow consumer does not hold this thread's one.
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        try:
+            query = "SELECT data FROM entries WHERE result_id = ? ORDER BY seq"
+            params = (result_id,)
+            if limit is not None:
+                query += " LIMIT ?"
+                params += (limit,)
+            cursor = conn.execute(query, params)
+            while True:
+                rows = cursor.fetchmany(FETCH_SIZE)
+                if not rows:
+                    break
+                for (data,) in rows:
+                    yield json.loads(data)
+        finally:
+            conn.close()
+
+    def load_report_data(self, result_id):
+        """Returns report data in the shape PDFReport.add_hashing_results expects.
+
+        Directory entries are an iterator over the store, not a list.
+        """
+        header = self.get(result_id)
+        if header is None:
+            return None
+        report_data = {'algorithms': header.get('algorithms')}
+        for key in ('text_results', 'file_results'):
+            if header.get(key):
+                report_data[key] = header[key]
+        if header.get('summary') is not None:
+            report_data['dir_results'] = {
+                'summary': header['summary'],
+                'results': self.iter_entries(result_id),
+            }
+        return report_data
+
+    def purge_expired(self, force=False):
+        """Deletes results past their TTL. Runs at most once a minute unless forced."""
+        now = time.time()
+        if not force and now - self._last_purge < 60:
+            return
+        self._last_purge = now
+        cutoff = now - self.ttl_seconds
+        conn = self._connect()
+        with conn:
+            conn.execute(
+                "DELETE FROM entries WHERE result_id IN (SELECT id FROM results WHERE created < ?)",
+                (cutoff,)
+            )
+            conn.execute("DELETE FROM results WHERE created < ?", (cutoff,))
@@ -0,0 +1,34 @@
+# forensic_tool_web/sqlite_util.py
+
+"""Per-thread SQLite connections for the hash cache, result store and similarity index.
+
+A sqlite3 connection may only be used by the thread that opened it, so
+each thread keeps one connection per database, opened in WAL mode so that
+readers do not block the writer.
+"""
+
+import os
+import sqlite3
+import threading
+
+_local = threading.local()
+
+def _reset():
+    # A forked child must not share its parent's connections.
+    global _local
+    _local = threading.local()
+
+os.register_at_fork(after_in_child=_reset)
+
+def connect(db_path):
+    """Returns the calling thread's connection to db_path, opening it on first use."""
+    conns = getattr(_local, 'conns', None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conns[db_path] = conn
+    return conn
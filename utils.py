@@ -2,24 +2,54 @@
 
 import os
 import datetime
+import functools
 
+from metrics import timed
+
+@functools.lru_cache(maxsize=4096)
+def _format_mtime(seconds):
+    # Files unpacked or copied together share mtimes, so most calls are cache hits.
+    return datetime.datetime.fromtimestamp(seconds).strftime('%Y-%m-%d %H:%M:%S')
+
+def format_mtime(mtime):
+    """Formats a POSIX mtime the way all metadata shows it, to the second."""
+    return _format_mtime(int(mtime // 1))
+
+def file_metadata(file_path, size, mtime):
+    """Builds file metadata from values already known, e.g. from walker.walk_files(), without a stat."""
+    return {
+        "File Name": os.path.basename(file_path),
+        "File Size": size,
+        "File Path": file_path,
+        "Last Modified Time": format_mtime(mtime),
+        "File Type/Extension": os.path.splitext(file_path)[1]
+    }
+
+@timed('metadata')
 def get_file_metadata(file_path):
     """Gathers metadata for a given file."""
     try:
         file_stat = os.stat(file_path)
-        return {
-            "File Name": os.path.basename(file_path),
-            "File Size": file_stat.st_size,
-            "File Path": os.path.abspath(file_path),
-            "Last Modified Time": datetime.datetime.fromtimestamp(file_stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-            "File Type/Extension": os.path.splitext(file_path)[1]
-        }
+        return file_metadata(os.path.abspath(file_path), file_stat.st_size, file_stat.st_mtime)
     except FileNotFoundError:
         return None
     except Exception as e:
         print(f"Error getting metadata for {file_path}: {e}")
         return None
 
+# "File Path" shown for uploads that were hashed in flight and never written to disk.
+NOT_RETAINED = "Streamed upload (not retained)"
+
+def get_upload_metadata(filename, size, retained_path=None):
+    """Builds file metadata for an upload that was hashed while it was received."""
+    return {
+        "File Name": filename,
+        "File Size": size,
+        "File Path": os.path.abspath(retained_path) if retained_path else NOT_RETAINED,
+        "Last Modified Time": datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        "File Type/Extension": os.path.splitext(filename)[1]
+    }
+
 def format_size(size_bytes):
     """Formats file size into a human-readable format."""
     if size_bytes == 0:
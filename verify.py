@@ -0,0 +1,193 @@
+# forensic_tool_web/verify.py
+
+import csv
+import datetime
+import io
+import json
+import os
+import zipfile
+
+from archives import SEPARATOR
+from hashing import BUFFER_SIZE, hash_file, hash_stream
+from utils import format_mtime
+from walker import walk_files
+
+# Strongest first; verification recomputes only the first one the manifest has.
+ALGORITHM_PREFERENCE = [
+    'SHA256', 'BLAKE2B', 'SHA3_256', 'SHA512', 'SHA3_512', 'SHA384', 'SHA3_384',
+    'SHA224', 'SHA3_224', 'SHA1', 'MD5'
+]
+
+def _normalize(path):
+    return path.replace('\\', '/').lstrip('/')
+
+def load_manifest(source):
+    """Parses a JSON Lines, CSV or hashdeep manifest from manifest.py into {path: entry}.
+
+    source may be a path or a text/binary file object. Each entry has
+    'size', 'modified' (or None), optional 'crc32' and 'hashes'.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, 'rb') as f:
+            return load_manifest(f)
+    text = source.read()
+    if isinstance(text, bytes):
+        text = text.decode('utf-8-sig')
+    lines = text.splitlines()
+    first = next((line for line in lines if line.strip()), '')
+
+    entries = {}
+    if first.startswith('%%%% HASHDEEP'):
+        columns = []
+        for line in lines:
+            if line.startswith('%%%% size,'):
+                columns = [c.upper() for c in line[len('%%%% '):].split(',')]
+                continue
+            if not line or line.startswith('%%%%') or line.startswith('#'):
+                continue
+            # The file name is last and may itself contain commas.
+            fields = line.split(',', len(columns) - 1)
+            record = dict(zip(columns, fields))
+            entries[_normalize(record['FILENAME'])] = {
+                'size': int(record['SIZE']), 'modified': None,
+                'hashes': {alg: record[alg] for alg in columns if alg not in ('SIZE', 'FILENAME')},
+            }
+    elif first.startswith('{'):
+        for line in lines:
+            if line.strip():
+                record = json.loads(line)
+                entries[_normalize(record['path'])] = {
+                    'size': record['size'], 'modified': record.get('modified'),
+                    'crc32': record.get('crc32'), 'hashes': record['hashes'],
+                }
+    else:
+        reader = csv.DictReader(io.StringIO(text))
+        fixed = {'path', 'name', 'size', 'modified', 'known_status'}
+        for row in reader:
+            entries[_normalize(row['path'])] = {
+                'size': int(row['size']), 'modified': row.get('modified') or None,
+                'hashes': {k: v for k, v in row.items() if k not in fixed and v},
+            }
+    return entries
+
+def choose_algorithm(entries):
+    """Returns the strongest algorithm that every manifest entry with digests has."""
+    available = None
+    for entry in entries.values():
+        if not entry['hashes']:
+            # Skipped or corrupt when the manifest was written; _compare() reports these.
+            continue
+        algs = set(entry['hashes'])
+        available = algs if available is None else available & algs
+    for alg in ALGORITHM_PREFERENCE:
+        if available and alg in available:
+            return alg
+    raise ValueError("The manifest has no digest algorithm common to all entries.")
+
+def _compare(entries, present, read_digest, algorithm, fail_fast, quick, progress=None):
+    """Shared verification pass.
+
+    present maps path -> (size, modified, crc32 or None); read_digest(path,
+    progress) returns the hex digest for algorithm. Cheap checks run for
+    every file before any content is read. Members of nested archives
+    ("a.zip!/b") are covered by their container's digest and are not
+    checked on their own. progress(nbytes, files) is called as manifest
+    entries are settled.
+    """
+    entries = {path: entry for path, entry in entries.items() if SEPARATOR not in path}
+    report = {
+        'algorithm': algorithm,
+        'matched': [], 'modified': [], 'missing': [], 'added': [],
+        'mtime_changed': [], 'stopped_early': False,
+    }
+    report['missing'] = sorted(set(entries) - set(present))
+    report['added'] = sorted(set(present) - set(entries))
+
+    to_read = []
+    for path in sorted(set(entries) & set(present)):
+        expected = entries[path]
+        size, modified, crc32 = present[path]
+        if size != expected['size']:
+            report['modified'].append({'path': path, 'reason': 'size'})
+            continue
+        if crc32 and expected.get('crc32') and crc32 != expected['crc32']:
+            report['modified'].append({'path': path, 'reason': 'crc32'})
+            continue
+        if algorithm not in expected['hashes']:
+            report['modified'].append({'path': path, 'reason': 'no reference digest'})
+            continue
+        mtime_same = expected.get('modified') is None or modified == expected['modified']
+        if not mtime_same:
+            report['mtime_changed'].append(path)
+        if quick and mtime_same and expected.get('modified') is not None:
+            report['matched'].append(path)
+            continue
+        to_read.append(path)
+    if progress:
+        progress(0, len(entries) - len(to_read))
+
+    if fail_fast and report['modified']:
+        report['stopped_early'] = bool(to_read)
+        return report
+
+    for i, path in enumerate(to_read):
+        digest = read_digest(path, progress)
+        if progress:
+            progress(0, 1)
+        if digest is not None and digest.lower() == entries[path]['hashes'][algorithm].lower():
+            report['matched'].append(path)
+            continue
+        report['modified'].append({'path': path, 'reason': 'digest' if digest else 'unreadable'})
+        if fail_fast:
+            report['stopped_early'] = i < len(to_read) - 1
+            break
+    report['matched'].sort()
+    return report
+
+def verify_directory(entries, directory_path, algorithm=None, fail_fast=False, quick=False, progress=None):
+    """Checks a directory tree against parsed manifest entries.
+
+    Missing and new files come from the path index alone, size changes from
+    a stat, and only then are the remaining files read, with a single
+    algorithm. quick=True also accepts files whose size and mtime match
+    without reading them; fail_fast stops at the first modified file.
+    progress(nbytes, files) counts bytes read and manifest entries checked.
+    """
+    algorithm = algorithm or choose_algorithm(entries)
+    present = {}
+    root = os.path.abspath(directory_path)
+    for entry in walk_files(root):
+        present[_normalize(os.path.relpath(entry.path, root))] = (entry.size, format_mtime(entry.mtime), None)
+
+    def read_digest(path, progress):
+        hashes = hash_file(os.path.join(directory_path, *path.split('/')), progress=progress,
+                           algorithms=[algorithm.lower()])
+        return hashes[algorithm] if hashes else None
+
+    return _compare(entries, present, read_digest, algorithm, fail_fast, quick, progress)
+
+def verify_zip(entries, zip_source, algorithm=None, fail_fast=False, quick=False, progress=None):
+    """Checks the members of a ZIP archive against parsed manifest entries; see verify_directory()."""
+    algorithm = algorithm or choose_algorithm(entries)
+    with zipfile.ZipFile(zip_source, 'r') as archive:
+        infos = {}
+        present = {}
+        for info in archive.infolist():
+            if info.is_dir():
+                continue
+            path = _normalize(info.filename)
+            infos[path] = info
+            modified = datetime.datetime(*info.date_time).strftime('%Y-%m-%d %H:%M:%S')
+            present[path] = (info.file_size, modified, f"{info.CRC:08x}")
+
+        def read_digest(path, progress):
+            info = infos[path]
+            try:
+                with archive.open(info) as member:
+                    hashes = hash_stream(member, max(min(BUFFER_SIZE, info.file_size), 1), progress,
+                                         algorithms=[algorithm.lower()])
+            except zipfile.BadZipFile:
+                return None
+            return hashes[algorithm]
+
+        return _compare(entries, present, read_digest, algorithm, fail_fast, quick, progress)
@@ -0,0 +1,166 @@
+# forensic_tool_web/walker.py
+
+"""Directory walking built on os.scandir.
+
+Each file is stat'ed once, through its DirEntry, and filtered on name,
+size and mtime before it is ever opened. Files come out depth first: a
+directory's files in listing order, then each of its subdirectories in
+turn. That is the order os.walk() produced, so results do not change. FIFOs, sockets and device nodes are skipped, since
+opening them can block or never end.
+"""
+
+import collections
+import fnmatch
+import os
+import queue
+import stat
+import threading
+
+# Batches of files queued ahead of the consumer by the prefetch thread.
+PREFETCH_DEPTH = 8
+# Files handed over per batch, unless the consumer is already waiting.
+PREFETCH_BATCH = 256
+
+FileEntry = collections.namedtuple('FileEntry', 'path name size mtime mtime_ns')
+
+class WalkRules:
+    """Include/exclude rules applied before any file is opened.
+
+    include and exclude are glob patterns matched against the file name and
+    against the path relative to the walk root. min_size/max_size are in
+    bytes; newer_than/older_than are POSIX timestamps compared with mtime.
+    """
+
+    def __init__(self, include=None, exclude=None, min_size=None, max_size=None, newer_than=None,
+                 older_than=None):
+        self.include = list(include or [])
+        self.exclude = list(exclude or [])
+        self.min_size = min_size
+        self.max_size = max_size
+        self.newer_than = newer_than
+        self.older_than = older_than
+
+    def _matches(self, patterns, name, relpath):
+        return any(fnmatch.fnmatch(name, p) or fnmatch.fnmatch(relpath, p) for p in patterns)
+
+    def accepts_name(self, name, relpath):
+        if self.include and not self._matches(self.include, name, relpath):
+            return False
+        return not (self.exclude and self._matches(self.exclude, name, relpath))
+
+    def accepts_stat(self, st):
+        if self.min_size is not None and st.st_size < self.min_size:
+            return False
+        if self.max_size is not None and st.st_size > self.max_size:
+            return False
+        if self.newer_than is not None and st.st_mtime < self.newer_than:
+            return False
+        return self.older_than is None or st.st_mtime <= self.older_than
+
+def _scan(root, excluded_extensions, rules, follow_symlinks):
+    root = os.path.abspath(root)
+    prefix_len = len(root) + 1
+    try:
+        root_st = os.stat(root)
+    except OSError as e:
+        print(f"Error reading directory {root}: {e}")
+        return
+    visited = {(root_st.st_dev, root_st.st_ino)}
+    stack = [root]
+    while stack:
+        directory = stack.pop()
+        subdirs = []
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError as e:
+            print(f"Error reading directory {directory}: {e}")
+            continue
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirs.append(entry.path)
+                    continue
+                if entry.is_symlink() and entry.is_dir():
+                    if follow_symlinks:
+                        target = entry.stat()
+                        # A directory reached twice through links would loop forever.
+                        if (target.st_dev, target.st_ino) not in visited:
+                            visited.add((target.st_dev, target.st_ino))
+                            subdirs.append(entry.path)
+                    continue
+            except OSError:
+                continue
+
+            if os.path.splitext(entry.name)[1] in excluded_extensions:
+                continue
+            if rules is not None and not rules.accepts_name(entry.name, entry.path[prefix_len:]):
+                continue
+            try:
+                # Links to files are followed, as os.walk() callers always did.
+                st = entry.stat()
+            except OSError:
+                continue
+            if not stat.S_ISREG(st.st_mode):
+                continue
+            if rules is not None and not rules.accepts_stat(st):
+                continue
+            yield FileEntry(entry.path, entry.name, st.st_size, st.st_mtime, st.st_mtime_ns)
+        # Reversed onto the stack, so subdirectories are visited in listing order.
+        stack.extend(reversed(subdirs))
+
+def _prefetch(entries, depth):
+    """Runs a generator on a background thread, keeping up to depth batches of items ready."""
+    items = queue.Queue(maxsize=depth)
+    stop = threading.Event()
+    done = object()
+
+    def put(item):
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                pass
+        return False
+
+    def produce():
+        try:
+            batch = []
+            for item in entries:
+                batch.append(item)
+                # Batches keep queue overhead per file low; an idle consumer gets what there is.
+                if len(batch) >= PREFETCH_BATCH or items.empty():
+                    if not put(batch):
+                        return
+                    batch = []
+            if batch and not put(batch):
+                return
+            put(done)
+        except BaseException as e:
+            put(e)
+
+    thread = threading.Thread(target=produce, name='walker', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item = items.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield from item
+    finally:
+        # The consumer stopped early; let the producer thread finish.
+        stop.set()
+
+def walk_files(root, excluded_extensions=None, rules=None, follow_symlinks=False, prefetch=True):
+    """Yields a FileEntry (absolute path, name, size, mtime, mtime_ns) for each regular file under root.
+
+    With prefetch the walk runs on a background thread, so the next
+    directories are listed while the caller hashes the current files.
+    Directory symlinks are only entered with follow_symlinks, and never
+    twice.
+    """
+    entries = _scan(root, excluded_extensions or [], rules, follow_symlinks)
+    return _prefetch(entries, PREFETCH_DEPTH) if prefetch else entries